@@ -1,7 +1,15 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
-import pandas as pd
-import joblib
-import altair as alt
+
+# Scoring and charting libraries (scikit-learn, pandas, altair) are imported
+# lazily by the pages that need them, so a cold pod can render right away
+import metrics
+from schema import FORM_KEYS
+
+_WIZARD_PREDICTION = metrics.histogram('wizard_prediction_seconds', "Wizard prediction, cache lookup included.")
+_WHATIF_SWEEP = metrics.histogram('whatif_sweep_seconds', "Wizard what-if grid, cache lookup included.")
 
 # Set page config for a premium, clean look
 st.set_page_config(
@@ -120,25 +128,64 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-@st.cache_resource
+def _load_warm_predictor():
+    from predictor import FastPredictor
+    from prediction_cache import PredictionCache
+
+    # Shared LRU cache in front of the bundle (see bundle.py); it reloads
+    # itself when model.joblib changes on disk
+    cache = PredictionCache(
+        maxsize=int(os.environ.get("PREDICTION_CACHE_SIZE", 4096)),
+        ttl=float(os.environ.get("PREDICTION_CACHE_TTL", 3600)),
+    )
+    # One throwaway prediction (and explanation, which builds the explainer's
+    # tables) so the first real request hits a warm model
+    dummy = FastPredictor.new_row()
+    dummy.fill(0.0)
+    cache.predictor.predict_row(dummy)
+    cache.predictor.explain_row(dummy)
+    return cache
+
+@st.cache_resource(show_spinner=False)
+def start_model_warmup():
+    # Runs once per process: load and warm the model on a background thread
+    # while the first page renders
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-warmup").submit(_load_warm_predictor)
+
 def load_model():
-    return joblib.load("model.joblib")
+    try:
+        return start_model_warmup().result()
+    except Exception:
+        # Don't cache a failed load; the next rerun retries
+        start_model_warmup.clear()
+        raise
 
-@st.cache_data
-def load_data():
+@st.cache_resource(show_spinner=False)
+def _load_summary(mtime_ns):
+    from dashboard_summary import load_summary
+    return load_summary()
+
+def load_summary():
+    # Precomputed by `python dashboard_summary.py`; reloaded when the file changes
     try:
-        # Load a sample for data exploration features
-        df = pd.read_csv("cs-training.csv", nrows=10000)
-        df = df.rename(columns={'Unnamed: 0': 'ID'})
-        return df
-    except:
-        return pd.DataFrame()
-
-try:
-    model = load_model()
-except Exception as e:
-    st.error(f"Failed to load model: {e}")
-    st.stop()
+        from dashboard_summary import SUMMARY_PATH
+        return _load_summary(os.stat(SUMMARY_PATH).st_mtime_ns)
+    except Exception:
+        return None
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_server(port):
+    # Prometheus scrape endpoint for this Streamlit process (METRICS_PORT)
+    return metrics.serve(port, host=os.environ.get("METRICS_HOST", "127.0.0.1"))
+
+def render_chart(name, chart):
+    # Serializing the Vega-Lite spec is where chart time goes, so time just that
+    with metrics.histogram('chart_render_seconds', "Sending one dashboard chart.", chart=name).time():
+        st.altair_chart(chart, use_container_width=True)
+
+start_model_warmup()
+if os.environ.get("METRICS_PORT"):
+    start_metrics_server(int(os.environ["METRICS_PORT"]))
 
 # --- Sidebar Navigation ---
 with st.sidebar:
@@ -147,7 +194,7 @@ with st.sidebar:
     st.markdown("### Navigation Menu")
     page = st.radio(
         "",
-        ["Risk Assessment System", "Data Insights Dashboard", "System Architecture"],
+        ["Risk Assessment System", "Data Insights Dashboard", "Drift Monitor", "System Architecture"],
         label_visibility="collapsed"
     )
     
@@ -160,6 +207,9 @@ with st.sidebar:
     st.markdown("<br>", unsafe_allow_html=True)
     st.caption("Powered by HistGradientBoostingClassifier")
 
+    with st.expander("Performance metrics"):
+        st.code(metrics.format_summary() or "No measurements yet.", language=None)
+
 
 # --- Page Routing Logic ---
 
@@ -284,29 +334,25 @@ if page == "Risk Assessment System":
                 
                 if analyze_pressed:
                     st.session_state.analyze_trigger = True
+                    # Count this applicant once for drift, not on every rerun of the results
+                    st.session_state.observe_drift = True
 
     # --- Results Section ---
     if getattr(st.session_state, 'analyze_trigger', False):
         fd = st.session_state.form_data
         
-        # Prepare input data
-        input_data = pd.DataFrame([{
-            'RevolvingUtilizationOfUnsecuredLines': fd['revolving_utilization'],
-            'age': fd['age'],
-            'NumberOfTime30-59DaysPastDueNotWorse': fd['past_due_30_59'],
-            'DebtRatio': fd['debt_ratio'],
-            'MonthlyIncome': fd['monthly_income'],
-            'NumberOfOpenCreditLinesAndLoans': fd['open_lines'],
-            'NumberOfTimes90DaysLate': fd['past_due_90_plus'],
-            'NumberRealEstateLoansOrLines': fd['real_estate_lines'],
-            'NumberOfTime60-89DaysPastDueNotWorse': fd['past_due_60_89'],
-            'NumberOfDependents': fd['dependents']
-        }])
-        
         with st.container(border=True):
             st.subheader("Prediction Results", anchor=False)
             with st.spinner("Analyzing profile patterns with ML Engine..."):
-                prob = model.predict_proba(input_data)[0][1]
+                try:
+                    model = load_model()
+                except Exception as e:
+                    st.error(f"Failed to load model: {e}")
+                    st.stop()
+                # Scores the form values directly, without building a DataFrame;
+                # repeat profiles (Back/Next, reruns) are served from the cache
+                with _WIZARD_PREDICTION.time(), metrics.profile_once('wizard_prediction'):
+                    prob = model.predict_mapping(fd, FORM_KEYS, observe=st.session_state.pop('observe_drift', False))
                 
             res_col1, res_col2 = st.columns([1, 2])
             
@@ -337,7 +383,63 @@ if page == "Risk Assessment System":
                         <span>High Risk (100%)</span>
                     </div>
                 ''', unsafe_allow_html=True)
-                
+
+                # Exact per-feature contributions (TreeSHAP, in log-odds) for this profile
+                st.markdown("#### Top drivers")
+                drivers = model.explain_mapping(fd, FORM_KEYS)
+                if drivers is None:
+                    st.caption(f"Not available for this model: {model.predictor.explain_error}")
+                for driver in drivers or []:
+                    raises = driver['contribution'] > 0
+                    st.markdown(
+                        f"{'🔺' if raises else '🔻'} **{driver['label']}** ({driver['value']:,.2f}) "
+                        f"{'raises' if raises else 'lowers'} risk &nbsp;`{driver['contribution']:+.3f}`"
+                    )
+
+                # Every variant is scored in one batched call, then cached per profile
+                st.markdown("#### What-if analysis")
+                import altair as alt
+                import pandas as pd
+                from whatif import SWEEPS
+
+                labels = {key: spec[0] for key, spec in SWEEPS.items()}
+                wi_col1, wi_col2 = st.columns(2)
+                x = wi_col1.selectbox("Vary", list(SWEEPS), format_func=labels.get, key='whatif_x')
+                y = wi_col2.selectbox("Against", [None] + [key for key in SWEEPS if key != x],
+                                      format_func=lambda key: "Nothing (single curve)" if key is None else labels[key],
+                                      key='whatif_y')
+                with _WHATIF_SWEEP.time():
+                    axes, probs = model.sweep_mapping(fd, FORM_KEYS, x, y)
+                if y is None:
+                    curve = alt.Chart(pd.DataFrame({'x': axes[0], 'p': probs})).mark_line(color='#3b82f6').encode(
+                        x=alt.X('x:Q', title=labels[x]),
+                        y=alt.Y('p:Q', title="Default Probability", axis=alt.Axis(format='%')),
+                        tooltip=[alt.Tooltip('x:Q', title=labels[x]), alt.Tooltip('p:Q', format='.1%', title="Default Probability")]
+                    )
+                    current = alt.Chart(pd.DataFrame({'x': [fd[x]], 'p': [prob]})).mark_point(
+                        color='#ef4444', size=120, filled=True
+                    ).encode(x='x:Q', y='p:Q', tooltip=[alt.Tooltip('p:Q', format='.1%', title="This applicant")])
+                    render_chart('whatif_curve', (curve + current).properties(height=300))
+                else:
+                    grid = pd.DataFrame({
+                        'x': axes[0].repeat(len(axes[1])),
+                        'y': axes[1].tolist() * len(axes[0]),
+                        'p': probs.ravel(),
+                    })
+                    heatmap = alt.Chart(grid).mark_rect().encode(
+                        x=alt.X('x:O', title=labels[x], axis=alt.Axis(format='~g', labelOverlap=True)),
+                        y=alt.Y('y:O', title=labels[y], sort='descending', axis=alt.Axis(format='~g', labelOverlap=True)),
+                        color=alt.Color('p:Q', title="Default", scale=alt.Scale(scheme='redyellowgreen', reverse=True), legend=alt.Legend(format='%')),
+                        tooltip=[alt.Tooltip('x:Q', title=labels[x]), alt.Tooltip('y:Q', title=labels[y]),
+                                 alt.Tooltip('p:Q', format='.1%', title="Default Probability")]
+                    ).properties(height=350)
+                    render_chart('whatif_heatmap', heatmap)
+                    st.caption(f"This applicant: {labels[x]} {fd[x]:,}, {labels[y]} {fd[y]:,} ({prob * 100:.1f}%)")
+
+                cache_stats = model.stats()
+                st.caption(f"Prediction cache: {cache_stats['hits']:,} hits / {cache_stats['misses']:,} misses "
+                           f"({cache_stats['size']:,} of {cache_stats['maxsize']:,} entries)")
+
                 st.markdown("<br>", unsafe_allow_html=True)
                 if st.button("Reset Assessment Form", use_container_width=False):
                     st.session_state.step = 1
@@ -345,29 +447,28 @@ if page == "Risk Assessment System":
                     st.rerun()
 
 elif page == "Data Insights Dashboard":
+    import altair as alt
+
     st.title("Data Insights & Exploration", anchor=False)
     st.markdown("<div class='info-box'>Explore a sample of the historical banking dataset used to train our AI model. Understand key demographic and financial trends.</div>", unsafe_allow_html=True)
     
-    df = load_data()
+    summary = load_summary()
     
-    if df.empty:
-        st.error("⚠️ Could not load the dataset for insights. Ensure `cs-training.csv` is in the directory.")
+    if summary is None:
+        st.error("⚠️ Could not load the dataset summary for insights. Run `python dashboard_summary.py` with `cs-training.csv` in the directory.")
     else:
         # Overview Cards
         st.subheader("Dataset Snapshot")
         m1, m2, m3, m4 = st.columns(4)
-        m1.metric("Sample Size Analyzed", f"{len(df):,}")
-        m2.metric("Average Age", f"{int(df['age'].mean())} yrs")
-        
-        # Calculate overall default rate in the sample
-        default_rate = df['SeriousDlqin2yrs'].mean() * 100
-        m3.metric("Baseline Default Rate", f"{default_rate:.1f}%")
-        m4.metric("Avg Monthly Income", f"${df['MonthlyIncome'].mean():,.0f}")
+        m1.metric("Borrowers Analyzed", f"{summary['rows']:,}")
+        m2.metric("Average Age", f"{int(summary['mean_age'])} yrs")
+        m3.metric("Baseline Default Rate", f"{summary['default_rate'] * 100:.1f}%")
+        m4.metric("Avg Monthly Income", f"${summary['mean_monthly_income']:,.0f}")
         
         st.markdown("<br>", unsafe_allow_html=True)
 
         # Tabbed Charts
-        tab1, tab2, tab3 = st.tabs(["Age Demographics", "Income & Debt", "Data Table"])
+        tab1, tab2, tab3, tab4 = st.tabs(["Age Demographics", "Delinquency History", "Income & Debt", "Data Table"])
         
         with tab1:
             st.markdown("#### Does age impact loan defaulting?")
@@ -375,40 +476,122 @@ elif page == "Data Insights Dashboard":
             
             chart_col1, chart_col2 = st.columns(2)
             with chart_col1:
-                chart_age = alt.Chart(df).mark_bar(color='#3b82f6', cornerRadiusTopLeft=3, cornerRadiusTopRight=3).encode(
-                    alt.X("age:Q", bin=alt.Bin(maxbins=20), title="Borrower Age"),
-                    alt.Y('count()', title="Number of Borrowers"),
-                    tooltip=['count()']
+                chart_age = alt.Chart(summary['age_hist']).mark_bar(color='#3b82f6', cornerRadiusTopLeft=3, cornerRadiusTopRight=3).encode(
+                    alt.X("bin_start:Q", bin="binned", title="Borrower Age"),
+                    alt.X2("bin_end:Q"),
+                    alt.Y('count:Q', title="Number of Borrowers"),
+                    tooltip=[alt.Tooltip('bin_start:Q', title='From age'), alt.Tooltip('bin_end:Q', title='To age'), alt.Tooltip('count:Q', format=',', title='Borrowers')]
                 ).properties(height=350).interactive()
-                st.altair_chart(chart_age, use_container_width=True)
+                render_chart('age_histogram', chart_age)
                 
             with chart_col2:
-                df['Age Group'] = pd.cut(df['age'], bins=[0, 30, 45, 60, 100], labels=['<30', '30-45', '45-60', '60+'])
-                def_rate = df.groupby('Age Group', observed=False)['SeriousDlqin2yrs'].mean().reset_index()
-                def_rate['SeriousDlqin2yrs_pct'] = def_rate['SeriousDlqin2yrs'] * 100
-                
-                chart_rate = alt.Chart(def_rate).mark_bar(color='#ef4444', cornerRadiusTopLeft=3, cornerRadiusTopRight=3).encode(
-                    alt.X('Age Group:N', title="Age Group"),
+                chart_rate = alt.Chart(summary['age_groups']).mark_bar(color='#ef4444', cornerRadiusTopLeft=3, cornerRadiusTopRight=3).encode(
+                    alt.X('Age Group:N', title="Age Group", sort=None),
                     alt.Y('SeriousDlqin2yrs_pct:Q', title="Default Rate (%)"),
-                    tooltip=['Age Group', alt.Tooltip('SeriousDlqin2yrs_pct', format='.1f', title='Default Rate (%)')]
+                    tooltip=['Age Group', alt.Tooltip('SeriousDlqin2yrs_pct', format='.1f', title='Default Rate (%)'), alt.Tooltip('Borrowers:Q', format=',')]
                 ).properties(height=350)
-                st.altair_chart(chart_rate, use_container_width=True)
+                render_chart('age_default_rate', chart_rate)
 
         with tab2:
+            st.markdown("#### How strongly does past delinquency predict default?")
+            st.markdown("<p style='color: #A0AEC0;'>Default rate by how many times the borrower was late, for each delinquency bucket.</p>", unsafe_allow_html=True)
+            
+            chart_late = alt.Chart(summary['delinquency']).mark_line(point=True).encode(
+                x=alt.X('Times Late:N', sort=None, title="Times Late"),
+                y=alt.Y('Default Rate (%):Q'),
+                color=alt.Color('Feature:N', legend=alt.Legend(orient='bottom', title=None)),
+                tooltip=['Feature', 'Times Late', alt.Tooltip('Default Rate (%):Q', format='.1f'), alt.Tooltip('Borrowers:Q', format=',')]
+            ).properties(height=400)
+            render_chart('delinquency', chart_late)
+
+        with tab3:
             st.markdown("#### How does income correlate with debt obligations?")
             st.markdown("<p style='color: #A0AEC0;'>Hover over the points in the scatter plot below. Outliers with high debt ratios represent stressed profiles.</p>", unsafe_allow_html=True)
             
-            filtered_df = df[df['MonthlyIncome'] < 25000].dropna(subset=['MonthlyIncome', 'DebtRatio']).sample(min(1500, len(df)))
-            chart_scatter = alt.Chart(filtered_df).mark_circle(size=70, opacity=0.5, color='#a78bfa').encode(
+            chart_scatter = alt.Chart(summary['scatter']).mark_circle(size=70, opacity=0.5, color='#a78bfa').encode(
                 x=alt.X('MonthlyIncome:Q', title="Monthly Income ($)"),
                 y=alt.Y('DebtRatio:Q', title="Debt Ratio", scale=alt.Scale(domain=[0, 5], clamp=True)),
                 tooltip=['age', 'MonthlyIncome', 'DebtRatio', 'SeriousDlqin2yrs']
             ).properties(height=400).interactive()
-            st.altair_chart(chart_scatter, use_container_width=True)
+            render_chart('income_vs_debt', chart_scatter)
             
-        with tab3:
+        with tab4:
             st.markdown("#### Raw Sample Viewer")
-            st.dataframe(df.head(100), use_container_width=True)
+            st.dataframe(summary['preview'], use_container_width=True)
+
+elif page == "Drift Monitor":
+    import altair as alt
+    import pandas as pd
+
+    st.title("Drift & Data Quality Monitor", anchor=False)
+    service_url = os.environ.get("DRIFT_SERVICE_URL")
+    if service_url:
+        source = f"the scoring service at {service_url}"
+    else:
+        source = "profiles scored by this app's Risk Assessment wizard"
+    st.markdown(f"<div class='info-box'>Compares recent applicants from {source} with the training data the model was fitted on. "
+                "PSI above 0.2 means a feature's distribution has shifted enough to question the model's scores.</div>", unsafe_allow_html=True)
+
+    report = None
+    try:
+        if service_url:
+            import json
+            from urllib.request import urlopen
+
+            with urlopen(service_url.rstrip('/') + '/drift', timeout=5) as response:
+                report = json.load(response)
+        else:
+            monitor = load_model().monitor
+            report = monitor.report() if monitor is not None else None
+    except Exception as e:
+        st.error(f"Could not load the drift report: {e}")
+        st.stop()
+
+    if report is None:
+        st.warning("⚠️ No training baseline for this model. Retrain with `python train.py`, or put `cs-training.csv` in the directory.")
+    else:
+        features = report['features']
+        drifting = [name for name, f in features.items() if f['status'] == 'major shift']
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Applicants in Window", f"{report['rows']:,}")
+        m2.metric("Applicants Observed", f"{report['rows_observed']:,}")
+        m3.metric("Features Drifting", f"{len(drifting)} of {len(features)}")
+
+        if report['rows'] == 0:
+            st.info("No applicants scored yet. Drift appears here once traffic arrives.")
+        else:
+            pct = lambda v: None if v is None else v * 100
+            table = pd.DataFrame([{
+                'Feature': name,
+                'Status': f['status'],
+                'PSI': f['psi'],
+                'KS': f['ks'],
+                'Missing % (train)': pct(f['missing_baseline']),
+                'Missing % (recent)': pct(f['missing']),
+                'Outside training range %': pct(f['out_of_range']),
+                'Median (train)': f['median_baseline'],
+                'Median (recent)': f['median'],
+                'p99 (train)': f['p99_baseline'],
+                'p99 (recent)': f['p99'],
+            } for name, f in features.items()])
+            st.dataframe(table.style.format(precision=3, na_rep='–'), use_container_width=True, hide_index=True)
+
+            name = st.selectbox("Compare distributions for", list(features), index=list(features).index(drifting[0]) if drifting else 0)
+            f = features[name]
+            labels = [f"Decile {i + 1}" for i in range(len(f['share']) - 1)] + ["Missing"]
+            shares = pd.DataFrame({
+                'Bin': labels * 2,
+                'Share (%)': [s * 100 for s in f['share_baseline'] + f['share']],
+                'Data': ['Training'] * len(labels) + ['Recent'] * len(labels),
+            })
+            chart_drift = alt.Chart(shares).mark_bar().encode(
+                x=alt.X('Bin:N', sort=labels, title="Training-data decile"),
+                xOffset='Data:N',
+                y=alt.Y('Share (%):Q'),
+                color=alt.Color('Data:N', scale=alt.Scale(range=['#3b82f6', '#f59e0b']), legend=alt.Legend(orient='bottom', title=None)),
+                tooltip=['Data', 'Bin', alt.Tooltip('Share (%):Q', format='.1f')]
+            ).properties(height=350)
+            render_chart('drift_distribution', chart_drift)
 
 elif page == "System Architecture":
     st.title("System Architecture", anchor=False)
@@ -0,0 +1,164 @@
+"""Compact float32 export vs the flat .npz and the sklearn bundle: worker memory and parity.
+
+Run from the repository root:  python -m benchmarks.compact_model [--workers 8 --rows 101503]
+
+Memory: for each format a parent process loads the model, then forks
+``--workers`` children that each score the same rows (one OpenMP thread, as in
+score.py). While all children are alive every process reads its RSS, PSS and
+private memory from /proc/self/smaps_rollup; PSS splits shared pages between
+the processes mapping them, so its sum is what the host really pays.
+
+Parity: probabilities and log-odds of the compact export against the bundle,
+how many rows reach a different leaf in any tree because a threshold was
+rounded, and how many change risk category (the wizard's 10% / 30% cut-offs).
+Parity rows use a held-out seed (``--seed``): benchmarks.synthetic's default
+seed is the data a synthetic-trained bundle was fitted on, whose values sit
+exactly on training values and would hide fresh rows landing on a threshold.
+The same probability check runs on benchmarks.flat_model's bundle fitted
+with missing ``age`` values, whose NaNs reach the trees. Exits non-zero if
+the largest probability difference exceeds ``--tolerance`` or any split
+would send a row exactly on its threshold the other way.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from benchmarks.flat_model import MISSING_FEATURE, missing_value_bundle, missing_value_rows
+from benchmarks.synthetic import make_applicants
+from bundle import MODEL_PATH, load_bundle
+from flat_model import export_flat, load_flat
+
+LOADERS = {
+    'sklearn bundle': "from bundle import load_bundle; model, _ = load_bundle({path!r})",
+    'flat .npz': "from flat_model import load_flat; model = load_flat({path!r})",
+    'compact .npz': "from flat_model import load_flat; model = load_flat({path!r})",
+}
+
+# Parent: load, score once, fork the workers, then report everyone's memory
+# once all workers have scored and are still alive
+HOST = """
+import json, os
+import numpy as np
+{load}
+X = np.load({rows!r})
+model.predict_proba(X[:100])
+
+def memory():
+    fields = {{}}
+    for line in open('/proc/self/smaps_rollup'):
+        parts = line.split()
+        if parts[0] in ('Rss:', 'Pss:', 'Private_Clean:', 'Private_Dirty:'):
+            fields[parts[0][:-1]] = int(parts[1])
+    return {{'rss': fields['Rss'], 'pss': fields['Pss'], 'private': fields['Private_Clean'] + fields['Private_Dirty']}}
+
+workers = []
+for _ in range({workers}):
+    ready_r, ready_w = os.pipe()
+    go_r, go_w = os.pipe()
+    if os.fork() == 0:
+        model.predict_proba(X)
+        os.write(ready_w, b'1')
+        os.read(go_r, 1)
+        os.write(ready_w, json.dumps(memory()).encode())
+        os._exit(0)
+    workers.append((ready_r, go_w))
+for ready_r, _ in workers:
+    os.read(ready_r, 1)
+parent = memory()
+children = []
+for ready_r, go_w in workers:
+    os.write(go_w, b'1')
+    children.append(json.loads(os.read(ready_r, 4096)))
+for _ in workers:
+    os.wait()
+print(json.dumps({{'parent': parent, 'workers': children}}))
+"""
+
+
+def measure(name, path, rows_path, workers):
+    env = dict(os.environ, OMP_NUM_THREADS='1')
+    script = HOST.format(load=LOADERS[name].format(path=path), rows=rows_path, workers=workers)
+    out = subprocess.run([sys.executable, '-W', 'ignore', '-c', script], capture_output=True, text=True,
+                         check=True, env=env).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--workers', type=int, default=8, help="Forked scoring workers per format.")
+    parser.add_argument('--rows', type=int, default=101503, help="Rows for the parity report (and scored per worker).")
+    parser.add_argument('--seed', type=int, default=5,
+                        help="Seed of the parity rows; keep it away from the training data's (42).")
+    parser.add_argument('--tolerance', type=float, default=1e-6, help="Largest acceptable probability difference.")
+    args = parser.parse_args()
+
+    pipeline, _ = load_bundle(args.model)
+    X = make_applicants(args.rows, seed=args.seed, labels=False).drop(columns='SeriousDlqin2yrs').to_numpy()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {
+            'sklearn bundle': os.path.abspath(args.model),
+            'flat .npz': os.path.join(tmp, 'model.npz'),
+            'compact .npz': os.path.join(tmp, 'model-compact.npz'),
+        }
+        export_flat(args.model, paths['flat .npz'])
+        export_flat(args.model, paths['compact .npz'], compact=True)
+        rows_path = os.path.join(tmp, 'rows.npy')
+        np.save(rows_path, X[:20000])
+
+        print(f"{args.workers} forked workers per format, each scoring {min(args.rows, 20000):,} rows")
+        print(f"{'Format':<16} {'On disk KiB':>12} {'RSS/worker MiB':>15} {'Private/worker MiB':>19} "
+              f"{'Total PSS MiB':>14}")
+        for name, path in paths.items():
+            memory = measure(name, path, rows_path, args.workers)
+            workers = memory['workers']
+            rss = np.mean([w['rss'] for w in workers]) / 1024
+            private = np.mean([w['private'] for w in workers]) / 1024
+            total = (memory['parent']['pss'] + sum(w['pss'] for w in workers)) / 1024
+            print(f"{name:<16} {os.path.getsize(path) / 1024:>12.0f} {rss:>15.1f} {private:>19.2f} {total:>14.1f}")
+
+        flat = load_flat(paths['flat .npz'])
+        compact = load_flat(paths['compact .npz'])
+        Xt = flat.transform(X)
+        expected_p = pipeline.predict_proba(X)[:, 1]
+        expected_raw = pipeline.named_steps['model'].decision_function(pipeline.named_steps['preprocess'].transform(X))
+        actual_p = compact.predict_proba(X)[:, 1]
+        actual_raw = compact.decision_function(Xt)
+        moved = (flat.leaves(Xt) != compact.leaves(Xt)).any(axis=1)
+        # A row exactly on a threshold must still go left after rounding
+        nodes = np.concatenate([predictors[0].nodes for predictors in pipeline.named_steps['model']._predictors])
+        split = ~nodes['is_leaf'].astype(bool)
+        misrouted = int((nodes['num_threshold'][split] > compact.threshold[split]).sum())
+
+        missing_path = os.path.join(tmp, 'missing.joblib')
+        missing_pipeline = missing_value_bundle(missing_path)
+        export_flat(missing_path, paths['compact .npz'], compact=True)
+        X_missing = missing_value_rows(20000)
+        missing_diff = np.abs(load_flat(paths['compact .npz']).predict_proba(X_missing)[:, 1]
+                              - missing_pipeline.predict_proba(X_missing)[:, 1]).max()
+
+    diff = np.abs(actual_p - expected_p)
+    bands = lambda p: np.digitize(p, [0.1, 0.3])
+    print(f"\nParity of the compact export on {args.rows:,} rows (against the sklearn bundle)")
+    print(f"  probability   max |diff| {diff.max():.3g}, p99 {np.percentile(diff, 99):.3g}, "
+          f"exactly equal {(diff == 0).mean():.2%}")
+    print(f"  log-odds      max |diff| {np.abs(actual_raw - expected_raw).max():.3g}")
+    print(f"  rows reaching a different leaf in any tree: {moved.sum():,} ({moved.mean():.3%})")
+    print(f"  rows changing risk category: {(bands(actual_p) != bands(expected_p)).sum():,}")
+    print(f"  splits sending a row exactly on the threshold the other way: {misrouted} of {split.sum():,}")
+    print(f"  probability max |diff| on {len(X_missing):,} rows with missing {MISSING_FEATURE} "
+          f"(bundle fitted with NaNs): {missing_diff:.3g}")
+    worst = max(diff.max(), missing_diff)
+    print(f"  tolerance {args.tolerance:g}: {'OK' if worst <= args.tolerance else 'EXCEEDED'}")
+    if worst > args.tolerance or misrouted:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""CSV parsing vs the typed columnar cache: load time and resident memory.
+
+Run from the repository root:  python -m benchmarks.data_cache [--csv cs-training.csv]
+Without --csv a 150,000-row synthetic file (the cs-training.csv size) is used.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synthetic import write_csv
+from dataset import load_training
+
+# Each loader runs in a fresh interpreter; RSS is measured before and after
+# loading and touching every column (a mean over the frame)
+CHILD = """
+import json, time
+import pandas as pd
+from dataset import load_training
+
+def rss():
+    return int([l.split()[1] for l in open('/proc/self/status') if l.startswith('VmRSS')][0]) / 1024
+
+before = rss()
+start = time.perf_counter()
+df = {load}
+load_s = time.perf_counter() - start
+df.mean()
+print(json.dumps({{'load_s': load_s, 'rss_mib': rss() - before,
+                   'frame_mib': df.memory_usage(deep=True).sum() / 2**20}}))
+"""
+
+LOADERS = {
+    'pd.read_csv (float64/int64)': "pd.read_csv({csv!r})",
+    'dataset.load_training': "load_training({csv!r})",
+}
+
+
+def measure(load):
+    out = subprocess.run([sys.executable, '-W', 'ignore', '-c', CHILD.format(load=load)],
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--csv', help="Training CSV to load (default: synthetic 150k rows).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv = os.path.abspath(args.csv or write_csv(os.path.join(tmp, 'cs-training.csv'), 150000))
+        # Build (or validate) the cache up front so only warm loads are compared
+        load_training(csv, verbose=True)
+
+        results = {name: measure(load.format(csv=csv)) for name, load in LOADERS.items()}
+        print(f"\n{'Loader':<30} {'Load (s)':>9} {'RSS +MiB':>9} {'Frame MiB':>10}")
+        for name, r in results.items():
+            print(f"{name:<30} {r['load_s']:>9.3f} {r['rss_mib']:>9.1f} {r['frame_mib']:>10.1f}")
+
+        csv_r, cache_r = results.values()
+        print(f"\nLoad time: {csv_r['load_s'] / cache_r['load_s']:.1f}x faster, "
+              f"frame memory: {csv_r['frame_mib'] / cache_r['frame_mib']:.1f}x smaller, "
+              f"RSS growth: {csv_r['rss_mib'] - cache_r['rss_mib']:.1f} MiB less")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Streaming drift monitor: cost on the scoring path, accuracy and memory.
+
+Run from the repository root:  python -m benchmarks.drift_monitor [--n 5000 --traffic 200000]
+
+Latency: the wizard's cached scoring path (PredictionCache.predict_mapping,
+first on cache misses, then on hits) and service.py's executor call
+(service.scoring_call, at several batch sizes) with the monitor attached and
+detached: wizard calls interleaved one by one, service calls in alternating
+phases so background binning is charged to the attached calls it follows. Accuracy: PSI and KS from the monitor's fixed
+histograms against exact ones (drift.psi, a two-sample KS on the raw values)
+for shifted traffic: MonthlyIncome tripled, 5% DebtRatio outliers and extra
+missing incomes. Memory: the monitor's counters before and after the traffic.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.single_row import random_profiles
+from benchmarks.synthetic import make_applicants
+from bundle import MODEL_PATH
+from drift import DriftMonitor, baseline, load_baseline, psi
+from prediction_cache import PredictionCache
+from schema import FEATURES, FORM_KEYS
+from service import scoring_call
+
+SERVICE_BATCHES = (1, 100, 10000)
+
+
+def ks_statistic(a, b):
+    a, b = np.sort(a[~np.isnan(a)]), np.sort(b[~np.isnan(b)])
+    values = np.concatenate([a, b])
+    return float(np.abs(np.searchsorted(a, values, side='right') / len(a)
+                        - np.searchsorted(b, values, side='right') / len(b)).max())
+
+
+def shifted_traffic(n):
+    traffic = make_applicants(n, seed=7, labels=False).drop(columns='SeriousDlqin2yrs')[FEATURES]
+    rng = np.random.default_rng(7)
+    traffic['MonthlyIncome'] *= 3
+    traffic.loc[rng.random(n) < 0.05, 'DebtRatio'] = 5000.0
+    traffic.loc[rng.random(n) < 0.10, 'MonthlyIncome'] = np.nan
+    return traffic
+
+
+def timed_lookups(cache, monitor, profiles):
+    latencies = {True: np.empty(len(profiles)), False: np.empty(len(profiles))}
+    for i, profile in enumerate(profiles):
+        for attached in (True, False):
+            cache.monitor = monitor if attached else None
+            if not attached:
+                # Detached calls must miss too, so vary the key
+                profile = dict(profile, age=profile['age'] + 1000)
+            start = time.perf_counter()
+            cache.predict_mapping(profile, FORM_KEYS)
+            latencies[attached][i] = time.perf_counter() - start
+    cache.monitor = monitor
+    return {k: v * 1e6 for k, v in latencies.items()}
+
+
+def timed_service(score_rows, monitor, X, batch, calls):
+    # Alternating phases rather than alternating calls: binning queued by an
+    # attached call runs during the next calls, which must count as attached
+    phases = {True: [], False: []}
+    for attached in (False, True, False, True):
+        call = scoring_call(score_rows, monitor if attached else None)
+        for i in range(calls // 2):
+            start_row = (i * batch) % max(len(X) - batch, 1)
+            block = X[start_row:start_row + batch].copy()
+            start = time.perf_counter()
+            call(block)
+            phases[attached].append(time.perf_counter() - start)
+        monitor._drain()
+    return {k: np.array(v) * 1e6 for k, v in phases.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--n', type=int, default=5000, help="Wizard profiles scored per pass.")
+    parser.add_argument('--traffic', type=int, default=200000, help="Shifted rows for the accuracy check.")
+    args = parser.parse_args()
+
+    reference = load_baseline(args.model)
+    source = "the model's training baseline"
+    if reference is None:
+        training = make_applicants(150000, labels=False).drop(columns='SeriousDlqin2yrs')
+        reference = baseline(training)
+        source = "a synthetic training baseline (the model has none and cs-training.csv is absent)"
+    print(f"Monitoring against {source}")
+
+    cache = PredictionCache(args.model, maxsize=4 * args.n, ttl=None)
+    monitor = DriftMonitor(reference)
+    profiles = random_profiles(args.n)
+    for profile in profiles[:50]:
+        cache.predict_mapping(dict(profile, age=-1), FORM_KEYS)
+
+    print(f"\nPredictionCache.predict_mapping, {args.n:,} profiles, monitor attached vs detached")
+    print(f"{'Path':<18} {'p50 on':>8} {'p50 off':>8} {'p99 on':>8} {'p99 off':>8}   (us)")
+    overheads = []
+    for name in ('cache miss', 'cache hit'):
+        lat = timed_lookups(cache, monitor, profiles)
+        on, off = lat[True], lat[False]
+        overheads.append(np.median(on) - np.median(off))
+        print(f"{name:<18} {np.percentile(on, 50):>8.1f} {np.percentile(off, 50):>8.1f} "
+              f"{np.percentile(on, 99):>8.1f} {np.percentile(off, 99):>8.1f}")
+    print(f"Median overhead: {overheads[0]:+.2f} us on a miss, {overheads[1]:+.2f} us on a hit")
+
+    score_rows = cache.predictor.predict_batch
+    service_rows = make_applicants(max(SERVICE_BATCHES) * 2, seed=11, labels=False)[FEATURES].to_numpy()
+    service_monitor = DriftMonitor(reference)
+    print(f"\nservice.scoring_call (executor model call), monitor attached vs detached")
+    print(f"{'Batch rows':<18} {'p50 on':>8} {'p50 off':>8} {'p99 on':>8} {'p99 off':>8}   (us)  Overhead")
+    for batch in SERVICE_BATCHES:
+        calls = max(20, min(2000, 200000 // batch))
+        lat = timed_service(score_rows, service_monitor, service_rows, batch, calls)
+        on, off = lat[True], lat[False]
+        print(f"{batch:<18,} {np.percentile(on, 50):>8.1f} {np.percentile(off, 50):>8.1f} "
+              f"{np.percentile(on, 99):>8.1f} {np.percentile(off, 99):>8.1f}        "
+              f"{(np.median(on) - np.median(off)) / np.median(off):+.1%}")
+
+    # Exact references need the raw training values, so compare on the synthetic distribution
+    training = make_applicants(150000, labels=False)
+    traffic = shifted_traffic(args.traffic)
+    X = traffic.to_numpy()
+    streaming = DriftMonitor(baseline(training), window=len(X))
+    before = streaming._current.nbytes + streaming._previous.nbytes
+    start = time.perf_counter()
+    streaming.observe_batch(X)
+    streaming._drain()
+    binning = (time.perf_counter() - start) / len(X) * 1e6
+    after = streaming._current.nbytes + streaming._previous.nbytes
+    report = streaming.report()
+    print(f"\nBinning (background thread): {binning:.2f} us per row; counters use "
+          f"{before / 1024:.1f} KiB before and {after / 1024:.1f} KiB after {len(X):,} rows")
+
+    print(f"\nShifted traffic ({len(X):,} rows) vs synthetic training data")
+    print(f"{'Feature':<38} {'PSI':>7} {'exact':>7} {'KS':>7} {'exact':>7}  Status")
+    for name in FEATURES:
+        f = report['features'][name]
+        print(f"{name:<38} {f['psi']:>7.4f} {psi(training[name], traffic[name]):>7.4f} "
+              f"{f['ks']:>7.4f} {ks_statistic(training[name].to_numpy(), traffic[name].to_numpy()):>7.4f}  {f['status']}")
+
+
+if __name__ == "__main__":
+    main()
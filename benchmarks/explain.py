@@ -0,0 +1,120 @@
+"""Cost and exactness of the precomputed TreeSHAP explanations.
+
+Run from the repository root:  python -m benchmarks.explain [--n 2000 --exact-rows 2]
+
+Reports the one-off table build, per-row explanation cost next to the
+prediction itself (single rows and batches), local accuracy (contributions
+plus the expected value must equal the model's log-odds) and, for a few rows,
+the largest difference from Shapley values computed by brute force over every
+feature subset straight from the tree nodes.
+"""
+import argparse
+import time
+from math import factorial
+
+import numpy as np
+
+from benchmarks.single_row import random_profiles
+from bundle import MODEL_PATH, load_bundle
+from explain import TreeExplainer
+from predictor import FastPredictor
+from schema import FORM_KEYS
+
+
+def per_row_us(fn, rows, repeat=3):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best / rows * 1e6
+
+
+def subset_values(model, x, n_features):
+    """Path-dependent expectation of the model output for every subset of known features.
+
+    Entry ``s`` conditions on the features whose bits are set in ``s``; the
+    other features follow both children, weighted by training counts.
+    """
+    members = (np.arange(2 ** n_features)[:, None] >> np.arange(n_features)) & 1 == 1
+    total = np.full(2 ** n_features, float(np.asarray(model._baseline_prediction).reshape(-1)[0]))
+    for predictors in model._predictors:
+        nodes = predictors[0].nodes
+
+        def expectation(node):
+            if nodes['is_leaf'][node]:
+                return nodes['value'][node]
+            feature = nodes['feature_idx'][node]
+            left, right = nodes['left'][node], nodes['right'][node]
+            value = x[feature]
+            goes_left = nodes['missing_go_to_left'][node] if np.isnan(value) else value <= nodes['num_threshold'][node]
+            left_value, right_value = expectation(left), expectation(right)
+            known = left_value if goes_left else right_value
+            unknown = (nodes['count'][left] * left_value + nodes['count'][right] * right_value) / nodes['count'][node]
+            return np.where(members[:, feature], known, unknown)
+
+        total += expectation(0)
+    return total
+
+
+def brute_force_shap(model, x, n_features):
+    values = subset_values(model, x, n_features)
+    subsets = np.arange(2 ** n_features)
+    sizes = np.array([bin(s).count('1') for s in subsets])
+    weights = np.array([factorial(k) * factorial(n_features - k - 1) / factorial(n_features)
+                        for k in range(n_features)])
+    phi = np.empty(n_features)
+    for i in range(n_features):
+        without = subsets[(subsets >> i) & 1 == 0]
+        phi[i] = np.sum(weights[sizes[without]] * (values[without | 1 << i] - values[without]))
+    return phi
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--n', type=int, default=2000, help="Profiles explained.")
+    parser.add_argument('--exact-rows', type=int, default=2, help="Rows checked against brute-force Shapley values.")
+    args = parser.parse_args()
+
+    pipeline, _ = load_bundle(args.model)
+    start = time.perf_counter()
+    explainer = TreeExplainer(pipeline)
+    build = time.perf_counter() - start
+    model = pipeline.named_steps['model']
+    print(f"Explainer for {len(model._predictors)} trees, {len(explainer._leaf_offset):,} leaves, "
+          f"depth {explainer.depth}: tables built in {build * 1e3:.0f} ms")
+
+    fast = FastPredictor(pipeline)
+    rows = np.vstack([FastPredictor.fill_row(fd, FORM_KEYS) for fd in random_profiles(args.n)])
+    X = fast.preprocess.transform(rows)
+    single = rows[:200]
+
+    print(f"\n{'Per row, us':<24} {'predict':>9} {'explain':>9} {'ratio':>7}")
+    timings = [
+        ('single row (n=200)',
+         per_row_us(lambda: [fast.predict_row(row[None]) for row in single], len(single)),
+         per_row_us(lambda: [explainer.shap_values(fast.preprocess.transform(row[None])) for row in single],
+                    len(single))),
+        (f'batch (n={args.n:,})',
+         per_row_us(lambda: fast.predict_batch(rows), len(rows)),
+         per_row_us(lambda: explainer.explain(rows), len(rows))),
+    ]
+    for name, predict_us, explain_us in timings:
+        print(f"{name:<24} {predict_us:>9.1f} {explain_us:>9.1f} {explain_us / predict_us:>6.1f}x")
+
+    contributions = explainer.shap_values(X)
+    gap = np.abs(explainer.expected_value + contributions.sum(axis=1) - model.decision_function(X)).max()
+    print(f"\nLocal accuracy: max |expected + sum(contributions) - log-odds| = {gap:.2e}")
+
+    if args.exact_rows:
+        start = time.perf_counter()
+        diffs = [np.abs(brute_force_shap(model, x, X.shape[1]) - phi).max()
+                 for x, phi in zip(X[:args.exact_rows], contributions)]
+        elapsed = (time.perf_counter() - start) / args.exact_rows
+        print(f"Brute-force Shapley ({2 ** X.shape[1]:,} subsets, {elapsed:.1f} s/row): "
+              f"max difference {max(diffs):.2e} over {args.exact_rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Feature engineering throughput, and train/serve feature-matrix identity.
+
+Run from the repository root:  python -m benchmarks.features [--rows 1000000]
+
+Times the notebook's pandas version of the cleaning + derived features against
+schema.transform_features() on synthetic rows. Then writes a sample to a CSV
+and checks that train.py's input (the file read through dataset.load_training's
+typed cache) and every serving path (the file parsed by pandas as score.py
+does, as an ndarray, in score.py's chunks, as single wizard rows through
+FastPredictor, and through the flat model's sklearn-free path) produce exactly
+the same matrix.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_applicants
+from dataset import load_training
+from predictor import FastPredictor
+from preprocessing import CreditPreprocessor
+from schema import DERIVED_FEATURES, FEATURES, FORM_KEYS, transform_features
+
+IDENTITY_ROWS = 20000
+# Small enough that the identity sample spans several score.py-style chunks
+CHUNK_ROWS = 3000
+
+
+def notebook_features(df, stats):
+    """project.ipynb's cleaning and feature cells, as pandas operations on a copy."""
+    df = df[FEATURES].copy()
+    for col, median in stats['medians'].items():
+        df[col] = df[col].fillna(median)
+    df.loc[df['age'] == 0, 'age'] = stats['age_zero_fill']
+    for col, fill in stats['sentinel_fill'].items():
+        df.loc[df[col].isin(stats['delinquency_sentinels']), col] = fill
+    df['RevolvingUtilizationOfUnsecuredLines'] = df['RevolvingUtilizationOfUnsecuredLines'].clip(upper=2)
+    df['DebtRatio_Is_Absolute'] = (df['DebtRatio'] > 10).astype(int)
+    df['DebtRatio'] = df['DebtRatio'].clip(upper=10)
+    df['MonthlyIncome_log'] = np.log1p(df['MonthlyIncome'])
+    df['DebtRatio_log'] = np.log1p(df['DebtRatio'])
+    df['Total_Past_Due'] = (df['NumberOfTime30-59DaysPastDueNotWorse']
+                            + df['NumberOfTime60-89DaysPastDueNotWorse']
+                            + df['NumberOfTimes90DaysLate'])
+    df['Income_Per_Dependent'] = df['MonthlyIncome'] / (df['NumberOfDependents'] + 1)
+    df['Monthly_Debt_Absolute'] = df['DebtRatio'] * df['MonthlyIncome']
+    return df[FEATURES + DERIVED_FEATURES].to_numpy(dtype=np.float64)
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Generating {args.rows:,} synthetic rows...")
+    df = make_applicants(args.rows, labels=False)[FEATURES]
+    pre = CreditPreprocessor(derived_features=True).fit(df)
+    stats = pre.manifest()
+    array = df.to_numpy()
+
+    paths = {
+        'notebook pandas': lambda: notebook_features(df, stats),
+        'transform (DataFrame)': lambda: pre.transform(df),
+        'transform (ndarray)': lambda: pre.transform(array),
+    }
+    results = {name: best_of(fn, args.repeat) for name, fn in paths.items()}
+    reference_s = results['notebook pandas'][0]
+    print(f"\n{'Path':<24} {'Seconds':>8} {'Rows/s':>13} {'Speedup':>8}")
+    for name, (seconds, _) in results.items():
+        print(f"{name:<24} {seconds:>8.3f} {args.rows / seconds:>13,.0f} {reference_s / seconds:>7.1f}x")
+
+    matrix = results['transform (DataFrame)'][1]
+    failures = []
+    if not np.array_equal(results['notebook pandas'][1], matrix, equal_nan=True):
+        failures.append('notebook pandas')
+
+    # Train/serve identity on the first IDENTITY_ROWS rows, from one CSV file
+    with tempfile.TemporaryDirectory() as tmp:
+        csv = os.path.join(tmp, 'cs-training.csv')
+        df.iloc[:IDENTITY_ROWS].to_csv(csv)
+        expected = pre.transform(load_training(csv, cache_dir=os.path.join(tmp, 'cache'))[FEATURES])
+        sample = pd.read_csv(csv, index_col=0)[FEATURES]
+    row = FastPredictor.new_row()
+    wizard = np.vstack([
+        pre.transform(FastPredictor.fill_row(dict(zip(FORM_KEYS, values)), FORM_KEYS, out=row))
+        for values in sample.to_numpy()
+    ])
+    serve_paths = {
+        'CSV parse (score.py)': pre.transform(sample),
+        'ndarray input': pre.transform(sample.to_numpy()),
+        'score.py chunks': np.vstack([pre.transform(sample.iloc[i:i + CHUNK_ROWS])
+                                      for i in range(0, len(sample), CHUNK_ROWS)]),
+        'wizard single rows': wizard,
+        # What FlatModel.transform runs, from the manifest stats alone
+        'flat model (schema)': transform_features(sample, stats),
+    }
+    print(f"\nTrain/serve identity on {len(sample):,} rows x {expected.shape[1]} features "
+          f"(train.py's load_training matrix vs each serving path):")
+    for name, serve in serve_paths.items():
+        same = np.array_equal(serve, expected, equal_nan=True)
+        print(f"  {name:<20} {'identical' if same else 'MISMATCH'}")
+        if not same:
+            failures.append(name)
+
+    if failures:
+        print(f"\nFeature matrices differ: {', '.join(failures)}")
+        sys.exit(1)
+    print("\nTraining and every serving path produce bit-identical feature matrices.")
+
+
+if __name__ == "__main__":
+    main()
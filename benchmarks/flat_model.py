@@ -0,0 +1,125 @@
+"""Flat .npz evaluator vs the sklearn bundle: parity, batch throughput, worker startup.
+
+Run from the repository root:  python -m benchmarks.flat_model [--rows 101503]
+
+Parity is also checked on a small bundle fitted with missing ``age`` values,
+which the preprocessing leaves to the trees: the model's own bundle is
+imputed, so it never reaches a node that routes NaNs on its own (including
+sklearn's "split on missing" nodes, whose threshold is +inf).
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_applicants
+from bundle import MODEL_PATH, build_pipeline, load_bundle, save_bundle
+from flat_model import export_flat, load_flat
+from schema import FEATURES
+
+# Not imputed by CreditPreprocessor, so its NaNs reach the trees
+MISSING_FEATURE = 'age'
+
+# Child processes report wall time and resident memory (VmRSS, KiB) after a cold load + one prediction
+STARTUP = {
+    'sklearn bundle': (
+        "from bundle import load_bundle; import numpy as np;"
+        "m, _ = load_bundle({model!r}); m.predict_proba(np.zeros((1, 10)))"
+    ),
+    'flat .npz': (
+        "from flat_model import load_flat; import numpy as np;"
+        "m = load_flat({flat!r}); m.predict_proba(np.zeros((1, 10)))"
+    ),
+}
+CHILD = (
+    "import time; t = time.perf_counter(); {body}; elapsed = time.perf_counter() - t;"
+    "rss = [l.split()[1] for l in open('/proc/self/status') if l.startswith('VmRSS')][0];"
+    "print(elapsed, rss)"
+)
+
+
+def startup(body, **paths):
+    out = subprocess.run([sys.executable, '-W', 'ignore', '-c', CHILD.format(body=body.format(**paths))],
+                         capture_output=True, text=True, check=True).stdout.split()
+    return float(out[0]), int(out[1]) / 1024
+
+
+def missing_value_bundle(path, rows=20000):
+    """Fit and save a bundle whose trees learned splits on missing MISSING_FEATURE values.
+
+    Missingness is made predictive of default, so some nodes split missing
+    against every real value, as it does in real data.
+    """
+    from sklearn.ensemble import HistGradientBoostingClassifier
+
+    df = make_applicants(rows)
+    rng = np.random.default_rng(0)
+    df.loc[rng.random(rows) < np.where(df['SeriousDlqin2yrs'] == 1, 0.4, 0.08), MISSING_FEATURE] = np.nan
+    model = HistGradientBoostingClassifier(max_iter=100, learning_rate=0.1, max_depth=5, random_state=42)
+    pipeline = build_pipeline(model).fit(df[FEATURES], df['SeriousDlqin2yrs'])
+    save_bundle(pipeline, path)
+    return pipeline
+
+
+def missing_value_rows(n, seed=5):
+    """Held-out raw rows with 30% missing MISSING_FEATURE and a few real +inf values."""
+    X = make_applicants(n, seed=seed, labels=False)[FEATURES]
+    X.loc[np.random.default_rng(seed).random(n) < 0.3, MISSING_FEATURE] = np.nan
+    X.iloc[:10, FEATURES.index(MISSING_FEATURE)] = np.inf
+    return X
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=101503, help="Rows to score (default: sampleEntry.csv size).")
+    parser.add_argument('--model', default=MODEL_PATH)
+    args = parser.parse_args()
+
+    pipeline, _ = load_bundle(args.model)
+    X = make_applicants(args.rows, labels=False).drop(columns='SeriousDlqin2yrs').to_numpy()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        flat_path = os.path.join(tmp, 'model.npz')
+        export_flat(args.model, flat_path)
+        flat = load_flat(flat_path)
+        print(f"Flat model: {flat.n_trees} trees, {flat.n_nodes:,} nodes, "
+              f"{os.path.getsize(flat_path) / 1024:.0f} KiB on disk (model.joblib: {os.path.getsize(args.model) / 1024:.0f} KiB)")
+
+        start = time.perf_counter()
+        expected = pipeline.predict_proba(X)[:, 1]
+        sklearn_s = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = flat.predict_proba(X)[:, 1]
+        flat_s = time.perf_counter() - start
+
+        print(f"\n{'Batch of ' + format(args.rows, ','):<22} {'Seconds':>9} {'Rows/sec':>12}")
+        print(f"{'sklearn bundle':<22} {sklearn_s:>9.3f} {args.rows / sklearn_s:>12,.0f}")
+        print(f"{'flat .npz':<22} {flat_s:>9.3f} {args.rows / flat_s:>12,.0f}")
+
+        print(f"\n{'Cold start':<22} {'Seconds':>9} {'RSS (MiB)':>15}")
+        for name, body in STARTUP.items():
+            seconds, rss = startup(body, model=os.path.abspath(args.model), flat=flat_path)
+            print(f"{name:<22} {seconds:>9.3f} {rss:>15.1f}")
+
+        missing_path = os.path.join(tmp, 'missing.joblib')
+        missing_pipeline = missing_value_bundle(missing_path)
+        export_flat(missing_path, flat_path)
+        X_missing = missing_value_rows(20000)
+        missing_diff = np.abs(load_flat(flat_path).predict_proba(X_missing)[:, 1]
+                              - missing_pipeline.predict_proba(X_missing)[:, 1])
+
+    diff = np.abs(actual - expected)
+    print(f"\nParity on {args.rows:,} rows: max |diff| = {diff.max():.3g}, "
+          f"exactly equal = {(diff == 0).mean():.2%}")
+    print(f"Parity on {len(X_missing):,} rows with missing {MISSING_FEATURE} (bundle fitted with NaNs): "
+          f"max |diff| = {missing_diff.max():.3g}")
+    if max(diff.max(), missing_diff.max()) > 1e-12:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Cost of the metrics layer: per-operation overhead and its share of a prediction.
+
+Run from the repository root:  python -m benchmarks.metrics_overhead [--n 5000]
+
+Times the bare timer/counter operations, then FastPredictor.predict_row on
+the same wizard profiles with metrics enabled and disabled (METRICS_DISABLED
+turns every timer into a no-op), interleaved so drift affects both equally.
+"""
+import argparse
+import time
+
+import numpy as np
+
+import metrics
+from benchmarks.single_row import random_profiles
+from bundle import load_bundle
+from predictor import FastPredictor
+from schema import FORM_KEYS
+
+OPS = 200000
+
+
+def per_op_ns(fn, n=OPS):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--n', type=int, default=5000, help="Profiles scored per mode.")
+    args = parser.parse_args()
+
+    registry = metrics.Registry()
+    histogram = registry.histogram('bench_seconds')
+    counter = registry.counter('bench_total')
+
+    def timed_block():
+        with histogram.time():
+            pass
+
+    loop_ns = per_op_ns(lambda: None)
+    print(f"{'Operation':<28} {'ns/op':>8}")
+    for name, fn in [('with histogram.time()', timed_block),
+                     ('histogram.observe(x)', lambda: histogram.observe(1e-3)),
+                     ('counter.inc()', counter.inc)]:
+        print(f"{name:<28} {per_op_ns(fn) - loop_ns:>8.0f}")
+
+    model, _ = load_bundle()
+    fast = FastPredictor(model)
+    profiles = random_profiles(args.n)
+    rows = [FastPredictor.fill_row(fd, FORM_KEYS) for fd in profiles]
+    for row in rows[:50]:
+        fast.predict_row(row)
+
+    latencies = {True: np.empty(args.n), False: np.empty(args.n)}
+    results = {True: np.empty(args.n), False: np.empty(args.n)}
+    for i, row in enumerate(rows):
+        for enabled in (True, False):
+            metrics.ENABLED = enabled
+            start = time.perf_counter()
+            results[enabled][i] = fast.predict_row(row)
+            latencies[enabled][i] = time.perf_counter() - start
+    metrics.ENABLED = True
+
+    on, off = latencies[True] * 1e6, latencies[False] * 1e6
+    print(f"\nFastPredictor.predict_row, {args.n:,} profiles")
+    print(f"{'Metrics':<10} {'p50 us':>9} {'p99 us':>9} {'mean us':>9}")
+    for name, lat in [('enabled', on), ('disabled', off)]:
+        print(f"{name:<10} {np.percentile(lat, 50):>9.1f} {np.percentile(lat, 99):>9.1f} {lat.mean():>9.1f}")
+    overhead = np.median(on) - np.median(off)
+    print(f"\nOverhead: {overhead:.1f} us per prediction ({overhead / np.median(off) * 100:.2f}% of p50)")
+    print(f"Outputs identical: {np.array_equal(results[True], results[False])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Load test for service.py: throughput and latency with micro-batching on and off.
+
+Run from the repository root:  python -m benchmarks.service_load [--requests 5000 --concurrency 64]
+
+Each mode starts its own service.py process, then keep-alive clients post
+single applicants to /score as fast as the server answers. Probabilities
+returned in both modes are compared for the same profiles.
+"""
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.single_row import random_profiles
+
+MODES = {
+    'batching off': 0,
+    'batching on (2 ms)': 2,
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+async def request(reader, writer, method, path, body=b''):
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    headers = await reader.readuntil(b'\r\n\r\n')
+    status = int(headers.split(b' ', 2)[1])
+    length = 0
+    for line in headers.split(b'\r\n'):
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':', 1)[1])
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def get(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        return (await request(reader, writer, 'GET', path))[1]
+    finally:
+        writer.close()
+
+
+async def wait_until_up(port, proc, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("service.py exited during startup")
+        try:
+            return await get(port, '/health')
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("service.py did not start in time")
+
+
+async def run_load(port, bodies, concurrency):
+    """Send every body once over ``concurrency`` connections; return latencies and answers."""
+    latencies = np.empty(len(bodies))
+    probabilities = np.empty(len(bodies))
+    next_index = iter(range(len(bodies)))
+
+    async def client():
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            for i in next_index:
+                start = time.perf_counter()
+                status, data = await request(reader, writer, 'POST', '/score', bodies[i])
+                latencies[i] = time.perf_counter() - start
+                if status != 200:
+                    raise RuntimeError(f"/score returned {status}: {data}")
+                probabilities[i] = data['probability']
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies * 1e3, probabilities
+
+
+async def benchmark(mode_ms, args, bodies):
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, 'service.py', '--model', args.model, '--port', str(port),
+                             '--batch-window-ms', str(mode_ms)], stdout=subprocess.DEVNULL)
+    try:
+        await wait_until_up(port, proc)
+        # Warm-up pass, not timed
+        await run_load(port, bodies[:args.concurrency * 4], args.concurrency)
+        elapsed, latencies, probabilities = await run_load(port, bodies, args.concurrency)
+        health = await get(port, '/health')
+    finally:
+        proc.terminate()
+        proc.wait()
+    return {
+        'throughput': len(bodies) / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'mean_batch': health['mean_batch_size'] or 1.0,
+        'probabilities': probabilities,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default="model.joblib")
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    args = parser.parse_args()
+
+    bodies = [json.dumps(profile).encode() for profile in random_profiles(args.requests)]
+    results = {name: asyncio.run(benchmark(ms, args, bodies)) for name, ms in MODES.items()}
+
+    print(f"\n{args.requests:,} /score requests, {args.concurrency} concurrent clients")
+    print(f"{'Mode':<22} {'Req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'Rows/call':>10}")
+    for name, r in results.items():
+        print(f"{name:<22} {r['throughput']:>8,.0f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['mean_batch']:>10.1f}")
+
+    off, on = results.values()
+    print(f"\nThroughput: {on['throughput'] / off['throughput']:.1f}x, p99: {off['p99_ms'] / on['p99_ms']:.1f}x lower")
+    same = np.array_equal(off['probabilities'], on['probabilities'])
+    print(f"Probabilities identical with and without batching: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Single-row latency: app.py's DataFrame path vs FastPredictor.
+
+Run from the repository root:  python -m benchmarks.single_row [--n 2000]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from bundle import load_bundle
+from predictor import FastPredictor
+from schema import FEATURES, FORM_KEYS
+
+
+def random_profiles(n, seed=0):
+    """Wizard-shaped form_data dicts covering the input widgets' ranges."""
+    rng = np.random.default_rng(seed)
+    return [{
+        'revolving_utilization': round(float(rng.uniform(0, 2)), 2),
+        'age': int(rng.integers(18, 101)),
+        'past_due_30_59': int(rng.poisson(0.5)),
+        'debt_ratio': round(float(rng.uniform(0, 10)), 1),
+        'monthly_income': int(rng.integers(0, 30)) * 500,
+        'open_lines': int(rng.integers(0, 51)),
+        'past_due_90_plus': int(rng.poisson(0.3)),
+        'real_estate_lines': int(rng.integers(0, 16)),
+        'past_due_60_89': int(rng.poisson(0.2)),
+        'dependents': int(rng.integers(0, 21)),
+    } for _ in range(n)]
+
+
+def dataframe_path(model, fd):
+    input_data = pd.DataFrame([{feature: fd[key] for feature, key in zip(FEATURES, FORM_KEYS)}])
+    return model.predict_proba(input_data)[0][1]
+
+
+def timed(fn, profiles):
+    latencies = np.empty(len(profiles))
+    results = np.empty(len(profiles))
+    for i, fd in enumerate(profiles):
+        start = time.perf_counter()
+        results[i] = fn(fd)
+        latencies[i] = time.perf_counter() - start
+    return results, latencies * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--n', type=int, default=2000, help="Profiles to score per path.")
+    args = parser.parse_args()
+
+    model, _ = load_bundle()
+    fast = FastPredictor(model)
+    profiles = random_profiles(args.n)
+
+    # Warm both paths before timing
+    dataframe_path(model, profiles[0])
+    fast.predict_mapping(profiles[0], FORM_KEYS)
+
+    slow_out, slow_us = timed(lambda fd: dataframe_path(model, fd), profiles)
+    fast_out, fast_us = timed(lambda fd: fast.predict_mapping(fd, FORM_KEYS), profiles)
+
+    print(f"{'Path':<22} {'p50 (us)':>10} {'p99 (us)':>10}")
+    for name, us in [("DataFrame (app.py)", slow_us), ("FastPredictor", fast_us)]:
+        print(f"{name:<22} {np.percentile(us, 50):>10.1f} {np.percentile(us, 99):>10.1f}")
+    print(f"p50 speedup: {np.percentile(slow_us, 50) / np.percentile(fast_us, 50):.2f}x")
+
+    identical = np.array_equal(slow_out, fast_out)
+    print(f"Outputs identical on {len(profiles):,} profiles: {identical}")
+    if not identical:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
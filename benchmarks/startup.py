@@ -0,0 +1,78 @@
+"""Cold-start cost of app.py: library import times and time-to-first-prediction.
+
+Every measurement runs in a fresh interpreter, like a newly scheduled pod.
+Run from the repository root:  python -m benchmarks.startup
+"""
+import json
+import subprocess
+import sys
+
+# Incremental import cost, in the order a cold pod would pay it
+IMPORTS = {
+    'streamlit': "import streamlit",
+    'pandas': "import pandas",
+    'altair': "import altair",
+    'scikit-learn + bundle': "import bundle",
+    'model.joblib load': "bundle.load_bundle()",
+}
+
+PROFILE = {
+    'age': 35, 'dependents': 1, 'monthly_income': 5000,
+    'revolving_utilization': 0.3, 'debt_ratio': 0.4, 'open_lines': 5, 'real_estate_lines': 1,
+    'past_due_30_59': 0, 'past_due_60_89': 0, 'past_due_90_plus': 0,
+}
+
+# First render of a page (reached via the sidebar, as a user would), then
+# optionally an immediate "Analyze Risk Profile"
+APP_RUN = """
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file('app.py', default_timeout=120)
+page = {page!r}
+at.run()
+if page != 'Risk Assessment System':
+    at.sidebar.radio[0].set_value(page).run()
+result = {{'first_render': time.perf_counter() - start}}
+if {predict!r}:
+    at.session_state['form_data'] = {profile!r}
+    at.session_state['analyze_trigger'] = True
+    at.run()
+    assert at.metric, 'no prediction rendered'
+    result['first_prediction'] = time.perf_counter() - start
+print(json.dumps(result))
+"""
+
+
+def run_child(code):
+    out = subprocess.run([sys.executable, '-W', 'ignore', '-c', code],
+                         capture_output=True, text=True, check=True).stdout
+    return out.strip().splitlines()[-1]
+
+
+def import_times():
+    lines = ["import json, time", "times = {}"]
+    for name, stmt in IMPORTS.items():
+        lines += ["t = time.perf_counter()", stmt, f"times[{name!r}] = time.perf_counter() - t"]
+    lines.append("print(json.dumps(times))")
+    return json.loads(run_child("\n".join(lines)))
+
+
+def app_run(page, predict=False):
+    return json.loads(run_child(APP_RUN.format(page=page, predict=predict, profile=PROFILE)))
+
+
+def main():
+    print(f"{'Import (cold, incremental)':<32} {'Seconds':>9}")
+    for name, seconds in import_times().items():
+        print(f"{name:<32} {seconds:>9.3f}")
+
+    print(f"\n{'app.py page (cold process)':<32} {'First render':>13} {'First prediction':>17}")
+    for page in ["System Architecture", "Data Insights Dashboard", "Risk Assessment System"]:
+        result = app_run(page, predict=(page == "Risk Assessment System"))
+        prediction = f"{result['first_prediction']:.3f}" if 'first_prediction' in result else "-"
+        print(f"{page:<32} {result['first_render']:>13.3f} {prediction:>17}")
+
+
+if __name__ == "__main__":
+    main()
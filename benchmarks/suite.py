@@ -0,0 +1,339 @@
+"""End-to-end performance suite: load, preprocess, train, model load and scoring, with a baseline check.
+
+Run from the repository root:
+    python -m benchmarks.suite -o results.json                      # record
+    python -m benchmarks.suite --baseline results.json              # compare, exit 1 on regression
+
+Synthetic Give-Me-Some-Credit-shaped data (benchmarks/synthetic.py, fixed
+seed) is written once per size to ``--work`` as CSV. For every training size
+the suite times pd.read_csv, CreditPreprocessor.fit_transform, train.py's
+pipeline fit and loading the saved bundle; predict_proba is timed at every
+batch size on the bundle fitted at ``--score-rows``. Each measurement runs in
+a fresh interpreter, repeats at least ``--repeat`` times and for at least
+MIN_SECONDS, and records the median and best of its runs and the peak RSS
+while it ran, so stages do not share warm caches or memory
+high-water marks.
+
+Results are JSON keyed ``stage/size``. With ``--baseline`` every key present
+in both files is compared: a best-of-repeats time ``--tolerance`` slower or a
+peak RSS ``--memory-tolerance`` larger than the baseline's is a regression
+(the minimum, as timeit uses, because medians of millisecond stages move by
+tens of percent with machine load; slowdowns under MIN_SLOWDOWN_SECONDS are
+jitter whatever their ratio). A flagged stage is re-measured ``--retries``
+times in fresh interpreters and keeps its best result, so one slow process
+is not reported as a regression. Baselines are only meaningful on the same
+hardware, library versions and thread count (both files record them).
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+SCHEMA_VERSION = 1
+
+HYPERPARAMETERS = "max_iter=100, learning_rate=0.1, max_depth=5, random_state=42"
+
+# Stage -> (untimed setup, timed statement, untimed teardown)
+STAGES = {
+    'csv_load': (
+        "import pandas as pd",
+        "df = pd.read_csv({csv!r}, index_col=0)",
+        "",
+    ),
+    'preprocess': (
+        "import pandas as pd\n"
+        "from preprocessing import CreditPreprocessor\n"
+        "from schema import FEATURES\n"
+        "X = pd.read_csv({csv!r}, index_col=0)[FEATURES]",
+        "CreditPreprocessor(derived_features=True).fit_transform(X)",
+        "",
+    ),
+    'fit': (
+        "import pandas as pd\n"
+        "from sklearn.ensemble import HistGradientBoostingClassifier\n"
+        "from bundle import build_pipeline, save_bundle\n"
+        "from schema import FEATURES\n"
+        "df = pd.read_csv({csv!r}, index_col=0)\n"
+        "X, y = df[FEATURES], df['SeriousDlqin2yrs']",
+        f"pipeline = build_pipeline(HistGradientBoostingClassifier({HYPERPARAMETERS})).fit(X, y)",
+        "save_bundle(pipeline, {model!r})",
+    ),
+    'model_load': (
+        # Import cost of the unpickled classes is benchmarks/startup.py's business
+        "import sklearn.ensemble\nfrom bundle import load_bundle",
+        "pipeline, manifest = load_bundle({model!r})",
+        "",
+    ),
+    'predict_proba': (
+        "from benchmarks.synthetic import make_applicants\n"
+        "from bundle import load_bundle\n"
+        "from schema import FEATURES\n"
+        "pipeline, _ = load_bundle({model!r})\n"
+        "X = make_applicants({batch}, seed={seed} + 1, labels=False)[FEATURES]\n"
+        "pipeline.predict_proba(X[:1])",
+        "pipeline.predict_proba(X)",
+        "",
+    ),
+}
+
+# On Linux the RSS high-water mark is reset after setup, so the peak is the
+# timed statement's own; elsewhere it falls back to the process lifetime peak
+CHILD = """
+import json, resource, time
+{setup}
+
+def rss_kib(field):
+    try:
+        for line in open('/proc/self/status'):
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+try:
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+except OSError:
+    pass
+setup_kib = rss_kib('VmRSS')
+times = []
+while len(times) < {repeat} or (sum(times) < {min_seconds} and len(times) < {max_repeats}):
+    start = time.perf_counter()
+    {stmt}
+    times.append(time.perf_counter() - start)
+peak_kib = rss_kib('VmHWM')
+{teardown}
+print(json.dumps({{'times': times, 'setup_kib': setup_kib, 'peak_kib': peak_kib}}))
+"""
+
+# Small batches are too quick to time once; repeat them this often instead
+MIN_REPEATS = {1: 300, 100: 100}
+# Every stage also repeats until it has run this long (as timeit's autorange
+# does), so ~10 ms stages get a best-of-100 rather than a best-of-3
+MIN_SECONDS = 1.0
+MAX_REPEATS = 1000
+# Slowdowns below this are timer and scheduler jitter whatever their ratio
+MIN_SLOWDOWN_SECONDS = 0.001
+
+
+def run_stage(stage, repeat, env, **paths):
+    setup, stmt, teardown = (part.format(**paths) for part in STAGES[stage])
+    code = CHILD.format(setup=setup, stmt=stmt, teardown=teardown, repeat=repeat,
+                        min_seconds=MIN_SECONDS, max_repeats=MAX_REPEATS)
+    out = subprocess.run([sys.executable, '-W', 'ignore', '-c', code], capture_output=True, text=True,
+                         check=True, env=env).stdout
+    raw = json.loads(out.strip().splitlines()[-1])
+    times = sorted(raw['times'])
+    return {
+        'median_seconds': times[len(times) // 2],
+        'min_seconds': times[0],
+        'repeats': len(times),
+        'peak_rss_mib': round(raw['peak_kib'] / 1024, 1),
+        'stage_rss_mib': round(max(raw['peak_kib'] - raw['setup_kib'], 0) / 1024, 1),
+    }
+
+
+def environment(threads):
+    import numpy
+    import pandas
+    import sklearn
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'scikit-learn': sklearn.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'threads': threads,
+        'commit': commit or None,
+    }
+
+
+def ensure_csv(work, rows, seed):
+    from benchmarks.synthetic import write_csv
+
+    path = os.path.join(work, f"train-{rows}-seed{seed}.csv")
+    if not os.path.exists(path):
+        print(f"Writing {rows:,} synthetic rows to {path}...")
+        write_csv(path + '.tmp', rows, seed)
+        os.replace(path + '.tmp', path)
+    return path
+
+
+def plan(args):
+    """(key, stage, repeat, format fields) for every measurement, in run order."""
+    jobs, models = [], {}
+    for rows in args.sizes:
+        paths = {'csv': ensure_csv(args.work, rows, args.seed),
+                 'model': os.path.join(args.work, f"model-{rows}-seed{args.seed}.joblib")}
+        for stage in ('csv_load', 'preprocess', 'fit', 'model_load'):
+            jobs.append((f"{stage}/{rows}", stage, args.repeat, paths))
+        models[rows] = paths['model']
+
+    score_rows = args.score_rows if args.score_rows in models else max(models)
+    for batch in args.batches:
+        repeat = max(args.repeat, MIN_REPEATS.get(batch, 0))
+        jobs.append((f"predict_proba/{batch}", 'predict_proba', repeat,
+                     {'model': models[score_rows], 'batch': batch, 'seed': args.seed}))
+    return jobs, score_rows
+
+
+def child_env(args):
+    env = dict(os.environ)
+    if args.threads:
+        env['OMP_NUM_THREADS'] = str(args.threads)
+    return env
+
+
+def record(results, key, result):
+    results[key] = result
+    print(f"{key:<28} {result['median_seconds'] * 1e3:>12.2f} {result['min_seconds'] * 1e3:>12.2f} "
+          f"{result['peak_rss_mib']:>10.1f} {result['stage_rss_mib']:>10.1f}")
+
+
+def run_suite(args):
+    os.makedirs(args.work, exist_ok=True)
+    env = child_env(args)
+    jobs, score_rows = plan(args)
+    results = {}
+    print(f"{'Stage/size':<28} {'Median ms':>12} {'Min ms':>12} {'Peak MiB':>10} {'Stage MiB':>10}")
+    for key, stage, repeat, fields in jobs:
+        record(results, key, run_stage(stage, repeat, env, **fields))
+
+    return {
+        'schema_version': SCHEMA_VERSION,
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'environment': environment(args.threads),
+        'config': {'sizes': args.sizes, 'batches': args.batches, 'seed': args.seed,
+                   'repeat': args.repeat, 'min_seconds': MIN_SECONDS, 'score_rows': score_rows},
+        'results': results,
+    }
+
+
+def remeasure(args, current, keys):
+    """Run ``keys`` again in fresh interpreters and keep each one's better result.
+
+    A whole interpreter can come out slow (page placement, a noisy neighbour)
+    and no number of repeats inside it recovers, so a flagged stage has to
+    be slow twice to count as a regression.
+    """
+    env = child_env(args)
+    jobs, _ = plan(args)
+    results = current['results']
+    print(f"\nRe-measuring {len(keys)} flagged stage(s) in fresh interpreters...")
+    for key, stage, repeat, fields in jobs:
+        if key in keys:
+            before, after = results[key], run_stage(stage, repeat, env, **fields)
+            best = min(before, after, key=lambda result: result['min_seconds'])
+            for field in ('peak_rss_mib', 'stage_rss_mib'):
+                best[field] = min(before[field], after[field])
+            record(results, key, best)
+
+
+def regressed(now, base, tolerance, memory_tolerance):
+    """(slower, bigger) for one stage's result against its baseline."""
+    slowdown = now['min_seconds'] - base['min_seconds']
+    return (slowdown > base['min_seconds'] * tolerance and slowdown > MIN_SLOWDOWN_SECONDS,
+            now['peak_rss_mib'] > base['peak_rss_mib'] * (1 + memory_tolerance))
+
+
+def compare(current, baseline, tolerance, memory_tolerance):
+    """Print current vs baseline for every shared key; return the regressed keys."""
+    for field in ('scikit-learn', 'numpy', 'pandas', 'python', 'machine', 'cpu_count', 'threads'):
+        before, after = baseline['environment'].get(field), current['environment'].get(field)
+        if before != after:
+            print(f"Warning: {field} differs from the baseline ({before} -> {after}); timings may not be comparable.")
+    for field in ('seed', 'score_rows'):
+        before, after = baseline['config'].get(field), current['config'].get(field)
+        if before != after:
+            print(f"Warning: {field} differs from the baseline ({before} -> {after}); results are not comparable.")
+    for field in ('repeat', 'min_seconds'):
+        before, after = baseline['config'].get(field), current['config'].get(field)
+        if before != after:
+            print(f"Warning: {field} differs from the baseline ({before} -> {after}); best-of times are not "
+                  f"comparable, as more repeats give lower minimums.")
+
+    regressions = []
+    print(f"\n{'Stage/size':<28} {'Base min ms':>11} {'Now min ms':>11} {'Change':>8} {'Base MiB':>9} {'Now MiB':>9}  Status")
+    for key, now in current['results'].items():
+        base = baseline['results'].get(key)
+        if base is None:
+            continue
+        ratio = now['min_seconds'] / base['min_seconds']
+        slower, bigger = regressed(now, base, tolerance, memory_tolerance)
+        status = ' + '.join(name for name, hit in (('SLOWER', slower), ('MORE MEMORY', bigger)) if hit) or 'ok'
+        if slower or bigger:
+            regressions.append(key)
+        print(f"{key:<28} {base['min_seconds'] * 1e3:>11.2f} {now['min_seconds'] * 1e3:>11.2f} "
+              f"{ratio - 1:>+8.1%} {base['peak_rss_mib']:>9.1f} {now['peak_rss_mib']:>9.1f}  {status}")
+    missing = sorted(set(baseline['results']) - set(current['results']))
+    if missing:
+        print(f"Not measured this run: {', '.join(missing)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=lambda s: [int(v) for v in s.split(',')], default=[10000, 150000, 1000000],
+                        help="Training sizes, comma-separated.")
+    parser.add_argument('--batches', type=lambda s: [int(v) for v in s.split(',')], default=[1, 100, 10000, 1000000],
+                        help="predict_proba batch sizes, comma-separated.")
+    parser.add_argument('--score-rows', type=int, default=150000,
+                        help="Training size of the bundle used for predict_proba (the real dataset's size).")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help=f"Timed runs per stage at least; short stages repeat for {MIN_SECONDS:g} s.")
+    parser.add_argument('--threads', type=int, help="OMP_NUM_THREADS for every stage (default: all cores).")
+    parser.add_argument('--work', default=os.path.join('.cache', 'benchmarks'),
+                        help="Where synthetic CSVs and fitted bundles are kept between runs.")
+    parser.add_argument('-o', '--output', help="Write the results JSON here.")
+    parser.add_argument('--baseline', help="Results JSON to compare against; exits 1 on regression.")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed relative slowdown of a stage's best time.")
+    parser.add_argument('--memory-tolerance', type=float, default=0.10, help="Allowed relative growth of peak RSS.")
+    parser.add_argument('--retries', type=int, default=2,
+                        help="Times a stage flagged against the baseline is re-measured before it counts.")
+    args = parser.parse_args()
+
+    # Read the baseline first so a bad path fails before a long run
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('schema_version') != SCHEMA_VERSION:
+            parser.error(f"{args.baseline} has schema version {baseline.get('schema_version')}, expected {SCHEMA_VERSION}.")
+
+    current = run_suite(args)
+    # Re-measure flagged stages before writing, so the file holds the confirmed numbers
+    if baseline is not None:
+        for _ in range(args.retries):
+            flagged = [key for key, now in current['results'].items() if key in baseline['results']
+                       and any(regressed(now, baseline['results'][key], args.tolerance, args.memory_tolerance))]
+            if not flagged:
+                break
+            remeasure(args, current, flagged)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare(current, baseline, args.tolerance, args.memory_tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}: {', '.join(regressions)}")
+            raise SystemExit(1)
+        print(f"\nNo regressions against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Synthetic Give-Me-Some-Credit-shaped applicants with a fixed seed."""
+import numpy as np
+import pandas as pd
+
+from schema import FEATURES
+
+
+def make_applicants(n, seed=42, labels=True):
+    """Return a cs-training.csv-shaped DataFrame of ``n`` rows.
+
+    Marginals roughly follow the real data, including the awkward parts:
+    ~20% missing MonthlyIncome, ~2.6% missing NumberOfDependents, 96/98
+    delinquency sentinels, age 0, and heavy-tailed utilization / DebtRatio.
+    """
+    rng = np.random.default_rng(seed)
+
+    def sentinel(counts):
+        return np.where(rng.random(n) < 0.002, rng.choice([96, 98], n), counts)
+
+    df = pd.DataFrame({
+        'RevolvingUtilizationOfUnsecuredLines': rng.beta(0.6, 1.2, n) * np.where(rng.random(n) < 0.003, 3000, 1.1),
+        'age': np.where(rng.random(n) < 1e-5, 0, rng.normal(52, 15, n).clip(21, 103).round()),
+        'NumberOfTime30-59DaysPastDueNotWorse': sentinel(rng.poisson(0.25, n)),
+        'DebtRatio': np.where(rng.random(n) < 0.2, rng.lognormal(7, 1.5, n), rng.beta(1.5, 3, n) * 1.5),
+        'MonthlyIncome': np.where(rng.random(n) < 0.2, np.nan, rng.lognormal(8.6, 0.7, n).round()),
+        'NumberOfOpenCreditLinesAndLoans': rng.poisson(8.5, n),
+        'NumberOfTimes90DaysLate': sentinel(rng.poisson(0.08, n)),
+        'NumberRealEstateLoansOrLines': rng.poisson(1.0, n),
+        'NumberOfTime60-89DaysPastDueNotWorse': sentinel(rng.poisson(0.06, n)),
+        'NumberOfDependents': np.where(rng.random(n) < 0.026, np.nan, rng.poisson(0.75, n)),
+    }, columns=FEATURES, index=pd.RangeIndex(1, n + 1))
+
+    if labels:
+        # Default risk rises with delinquencies and utilization, as in the real data
+        late = df[['NumberOfTime30-59DaysPastDueNotWorse', 'NumberOfTimes90DaysLate',
+                   'NumberOfTime60-89DaysPastDueNotWorse']].clip(upper=10).sum(axis=1)
+        logit = -3.2 + 0.6 * late + 1.5 * df['RevolvingUtilizationOfUnsecuredLines'].clip(upper=1.5) - 0.02 * (df['age'] - 50)
+        df.insert(0, 'SeriousDlqin2yrs', (rng.random(n) < 1 / (1 + np.exp(-logit))).astype(int))
+    else:
+        df.insert(0, 'SeriousDlqin2yrs', np.nan)
+    return df
+
+
+def write_csv(path, n, seed=42, labels=True):
+    """Write a synthetic file with the same layout as cs-training.csv / cs-test.csv."""
+    make_applicants(n, seed, labels).to_csv(path)
+    return path
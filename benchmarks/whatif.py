@@ -0,0 +1,86 @@
+"""What-if sweeps: one batched grid vs one prediction per variant.
+
+Run from the repository root:  python -m benchmarks.whatif [--n 50]
+
+For ``--n`` random wizard profiles: the cost of a single FastPredictor
+prediction; of a what-if curve (cycling through the SWEEPS fields) and a
+heatmap (up to 25 x 25 variants) scored as one batch with whatif.sweep; of
+the same grids scored with one predict_row call per variant, as rerunning
+the wizard per slider position would; and of a repeated sweep served from
+PredictionCache. Also checks every grid probability against predict_row.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.single_row import random_profiles
+from bundle import MODEL_PATH
+from prediction_cache import PredictionCache
+from schema import FORM_KEYS
+from whatif import SWEEPS, axis_values, sweep, variants
+
+PAIRS = [('revolving_utilization', 'debt_ratio'), ('age', 'monthly_income'), ('past_due_30_59', 'open_lines')]
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--n', type=int, default=50, help="Wizard profiles to sweep.")
+    args = parser.parse_args()
+
+    cache = PredictionCache(args.model, ttl=None)
+    predictor = cache.predictor
+    profiles = random_profiles(args.n, seed=3)
+    predictor.predict_mapping(profiles[0], FORM_KEYS)
+    sweep(predictor, profiles[0], FORM_KEYS, 'age')
+
+    single, batch_1d, loop_1d, batch_2d, loop_2d, cached = [], [], [], [], [], []
+    sizes = []
+    worst = 0.0
+    for i, profile in enumerate(profiles):
+        single.append(timed(lambda: predictor.predict_mapping(profile, FORM_KEYS), repeat=5)[1])
+        x = list(SWEEPS)[i % len(SWEEPS)]
+        x2, y2 = PAIRS[i % len(PAIRS)]
+        batch_1d.append(timed(lambda: sweep(predictor, profile, FORM_KEYS, x))[1])
+        (axes, probs), ms = timed(lambda: sweep(predictor, profile, FORM_KEYS, x2, y2))
+        batch_2d.append(ms)
+        sizes.append(probs.size)
+
+        row = predictor.fill_row(profile, FORM_KEYS)[0]
+        X = variants(row, [FORM_KEYS.index(x2), FORM_KEYS.index(y2)], axes)
+        per_row, ms = timed(lambda: np.array([predictor.predict_row(v.reshape(1, -1)) for v in X]))
+        loop_2d.append(ms)
+        worst = max(worst, float(np.abs(per_row - probs.ravel()).max()))
+        X = variants(row, [FORM_KEYS.index(x)], [axis_values(x)])
+        loop_1d.append(timed(lambda: [predictor.predict_row(v.reshape(1, -1)) for v in X])[1])
+
+        cache.sweep_mapping(profile, FORM_KEYS, x2, y2)
+        cached.append(timed(lambda: cache.sweep_mapping(profile, FORM_KEYS, x2, y2), repeat=20)[1])
+
+    points_1d = np.mean([len(axis_values(key)) for key in SWEEPS])
+    points_2d = np.mean(sizes)
+    print(f"What-if sweeps over {args.n} profiles (median ms per call)")
+    print(f"{'Call':<44} {'Variants':>9} {'ms':>9} {'x single':>9}")
+    base = np.median(single)
+    for name, points, values in [
+        ("single prediction (predict_mapping)", 1, single),
+        ("curve, one batch (whatif.sweep)", points_1d, batch_1d),
+        ("curve, one predict_row per variant", points_1d, loop_1d),
+        ("heatmap, one batch (whatif.sweep)", points_2d, batch_2d),
+        ("heatmap, one predict_row per variant", points_2d, loop_2d),
+        ("heatmap, repeated (PredictionCache hit)", points_2d, cached),
+    ]:
+        print(f"{name:<44} {points:>9.0f} {np.median(values):>9.3f} {np.median(values) / base:>9.2f}")
+    print(f"\nLargest |grid - predict_row| probability difference: {worst:.3g}")
+
+
+if __name__ == "__main__":
+    main()
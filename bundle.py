@@ -0,0 +1,99 @@
+import json
+import os
+from datetime import datetime, timezone
+
+import joblib
+import sklearn
+from sklearn.pipeline import Pipeline
+
+import metrics
+from preprocessing import CreditPreprocessor
+from schema import DEFAULT_MEDIANS, FEATURES, file_sha256
+
+# Bump whenever the pipeline layout or manifest schema changes
+BUNDLE_VERSION = 1
+MODEL_PATH = "model.joblib"
+
+_LOAD = metrics.histogram('model_load_seconds', "Loading a model file.", format='bundle')
+
+
+def manifest_path(model_path):
+    return os.path.splitext(model_path)[0] + ".manifest.json"
+
+
+def build_pipeline(model, preprocessor=None):
+    """Chain the shared preprocessing in front of an (unfitted or fitted) classifier.
+
+    The default preprocessor is train.py's: outlier rules plus the derived features.
+    """
+    return Pipeline([
+        ('preprocess', preprocessor if preprocessor is not None else CreditPreprocessor(derived_features=True)),
+        ('model', model),
+    ])
+
+
+def describe(pipeline, sha256, legacy=False, training=None, baseline=None):
+    """Build the manifest that travels with a scoring bundle.
+
+    ``training`` optionally records how the model was fitted (mode, rows,
+    fit_seconds), so incremental retraining can compare against it.
+    ``baseline`` is drift.baseline() of the raw training inputs, the
+    reference for monitoring scored traffic.
+    """
+    model = pipeline.named_steps['model']
+    return {
+        'bundle_version': BUNDLE_VERSION,
+        'legacy': legacy,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'sklearn_version': sklearn.__version__,
+        'sha256': sha256,
+        'features': FEATURES,
+        'preprocessing': pipeline.named_steps['preprocess'].manifest(),
+        'model': {
+            'class': type(model).__name__,
+            'params': {k: v for k, v in model.get_params().items() if isinstance(v, (int, float, str, bool, type(None)))},
+            'n_iter': int(getattr(model, 'n_iter_', 0)),
+        },
+        'training': training or {},
+        'drift_baseline': baseline,
+    }
+
+
+def save_bundle(pipeline, path=MODEL_PATH, training=None, baseline=None):
+    """Dump a fitted pipeline and write its manifest next to it."""
+    joblib.dump(pipeline, path)
+    manifest = describe(pipeline, file_sha256(path), training=training, baseline=baseline)
+    with open(manifest_path(path), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_bundle(path=MODEL_PATH):
+    """Load a scoring bundle and its manifest.
+
+    Models saved before bundles existed (a bare classifier fitted on the raw
+    DataFrame) are wrapped in an imputation-only pipeline that reproduces how
+    they were trained, with a manifest marked ``legacy``.
+    """
+    with _LOAD.time():
+        obj = joblib.load(path)
+        sha256 = file_sha256(path)
+
+    if isinstance(obj, Pipeline):
+        with open(manifest_path(path)) as f:
+            manifest = json.load(f)
+        if manifest.get('bundle_version') != BUNDLE_VERSION:
+            raise ValueError(f"{path} has bundle version {manifest.get('bundle_version')}, expected {BUNDLE_VERSION}.")
+        if manifest['sha256'] != sha256:
+            raise ValueError(f"{manifest_path(path)} does not describe {path} (checksum mismatch).")
+        return obj, manifest
+
+    names = list(getattr(obj, 'feature_names_in_', FEATURES))
+    if names != FEATURES:
+        raise ValueError(f"{path} was fitted on unexpected features: {names}")
+    # The pipeline always feeds arrays in FEATURES order, so drop the fitted
+    # names to skip sklearn's per-call column-name check
+    if hasattr(obj, 'feature_names_in_'):
+        del obj.feature_names_in_
+    pipeline = build_pipeline(obj, CreditPreprocessor.from_stats(DEFAULT_MEDIANS))
+    return pipeline, describe(pipeline, sha256, legacy=True)
@@ -0,0 +1,138 @@
+"""Precomputed aggregates for the Data Insights Dashboard.
+
+Run offline (after cs-training.csv changes) to write dashboard_summary.npz:
+
+    python dashboard_summary.py
+
+The dashboard reads only this file, so page loads cost the same no matter how
+large the training set is, and the figures cover every row.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset import load_training
+from schema import DELINQUENCY_COLS, DELINQUENCY_SENTINELS
+
+SUMMARY_PATH = "dashboard_summary.npz"
+SUMMARY_VERSION = 1
+
+AGE_BINS = [0, 30, 45, 60, 100]
+AGE_LABELS = ['<30', '30-45', '45-60', '60+']
+AGE_HIST_WIDTH = 5
+
+# Delinquency counts above this are pooled into one "N+" bucket
+MAX_DELINQUENCY = 10
+
+SCATTER_SIZE = 1500
+SCATTER_MAX_INCOME = 25000
+SCATTER_COLUMNS = ['age', 'MonthlyIncome', 'DebtRatio', 'SeriousDlqin2yrs']
+PREVIEW_ROWS = 100
+
+
+def stratified_sample(df, size, seed=42):
+    """Fixed-seed sample with the same default/non-default mix as ``df``."""
+    if len(df) <= size:
+        return df
+    rng = np.random.default_rng(seed)
+    parts = []
+    for _, group in df.groupby('SeriousDlqin2yrs'):
+        n = int(round(size * len(group) / len(df)))
+        parts.append(group.iloc[np.sort(rng.choice(len(group), n, replace=False))])
+    return pd.concat(parts).sort_index()
+
+
+def build_summary(df):
+    """Aggregate a full training frame into the arrays the dashboard draws."""
+    target = df['SeriousDlqin2yrs']
+    arrays = {}
+
+    ages = df['age'].dropna().to_numpy()
+    lo = np.floor(ages.min() / AGE_HIST_WIDTH) * AGE_HIST_WIDTH
+    hi = np.ceil((ages.max() + 1) / AGE_HIST_WIDTH) * AGE_HIST_WIDTH
+    arrays['age_hist_counts'], arrays['age_hist_edges'] = np.histogram(ages, bins=np.arange(lo, hi + 1, AGE_HIST_WIDTH))
+
+    groups = pd.cut(df['age'], bins=AGE_BINS, labels=AGE_LABELS)
+    by_age = target.groupby(groups, observed=False).agg(['mean', 'size'])
+    arrays['age_group_rate'] = by_age['mean'].to_numpy(dtype=np.float64)
+    arrays['age_group_count'] = by_age['size'].to_numpy(dtype=np.int64)
+
+    for i, col in enumerate(DELINQUENCY_COLS):
+        counts = df[col][~df[col].isin(DELINQUENCY_SENTINELS)].clip(upper=MAX_DELINQUENCY)
+        by_count = target[counts.index].groupby(counts).agg(['mean', 'size']).reindex(range(MAX_DELINQUENCY + 1))
+        arrays[f'delinquency_{i}_rate'] = by_count['mean'].to_numpy(dtype=np.float64)
+        arrays[f'delinquency_{i}_count'] = by_count['size'].fillna(0).to_numpy(dtype=np.int64)
+
+    scatter = df[df['MonthlyIncome'] < SCATTER_MAX_INCOME].dropna(subset=['MonthlyIncome', 'DebtRatio'])
+    arrays['scatter'] = stratified_sample(scatter, SCATTER_SIZE)[SCATTER_COLUMNS].to_numpy(dtype=np.float64)
+
+    preview = df.head(PREVIEW_ROWS)
+    arrays['preview'] = preview.to_numpy(dtype=np.float64)
+
+    meta = {
+        'summary_version': SUMMARY_VERSION,
+        'rows': int(len(df)),
+        'mean_age': float(df['age'].mean()),
+        'default_rate': float(target.mean()),
+        'mean_monthly_income': float(df['MonthlyIncome'].mean()),
+        'age_labels': AGE_LABELS,
+        'delinquency_cols': DELINQUENCY_COLS,
+        'max_delinquency': MAX_DELINQUENCY,
+        'scatter_columns': SCATTER_COLUMNS,
+        'preview_columns': list(preview.columns),
+    }
+    arrays['meta'] = np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8)
+    return arrays
+
+
+def load_summary(path=SUMMARY_PATH):
+    """Read the summary back as small DataFrames ready for charting."""
+    with np.load(path) as data:
+        arrays = {name: data[name] for name in data.files}
+    meta = json.loads(bytes(arrays['meta']).decode())
+    if meta['summary_version'] != SUMMARY_VERSION:
+        raise ValueError(f"{path} has summary version {meta['summary_version']}, expected {SUMMARY_VERSION}.")
+
+    edges = arrays['age_hist_edges']
+    summary = dict(meta)
+    summary['age_hist'] = pd.DataFrame({
+        'bin_start': edges[:-1], 'bin_end': edges[1:], 'count': arrays['age_hist_counts'],
+    })
+    summary['age_groups'] = pd.DataFrame({
+        'Age Group': meta['age_labels'],
+        'SeriousDlqin2yrs_pct': arrays['age_group_rate'] * 100,
+        'Borrowers': arrays['age_group_count'],
+    })
+    labels = [str(n) for n in range(meta['max_delinquency'])] + [f"{meta['max_delinquency']}+"]
+    summary['delinquency'] = pd.concat([
+        pd.DataFrame({
+            'Feature': col,
+            'Times Late': labels,
+            'Default Rate (%)': arrays[f'delinquency_{i}_rate'] * 100,
+            'Borrowers': arrays[f'delinquency_{i}_count'],
+        })
+        for i, col in enumerate(meta['delinquency_cols'])
+    ], ignore_index=True)
+    summary['scatter'] = pd.DataFrame(arrays['scatter'], columns=meta['scatter_columns'])
+    summary['preview'] = pd.DataFrame(arrays['preview'], columns=meta['preview_columns']).convert_dtypes()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate cs-training.csv for the dashboard.")
+    parser.add_argument('train', nargs='?', default='cs-training.csv')
+    parser.add_argument('-o', '--output', default=SUMMARY_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    print(f"Loading {args.train}...")
+    df = load_training(args.train, verbose=True)
+    np.savez(args.output, **build_summary(df))
+    print(f"Summarized {len(df):,} rows into {args.output} in {time.perf_counter() - start:.2f}s.")
+
+
+if __name__ == "__main__":
+    main()
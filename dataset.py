@@ -0,0 +1,172 @@
+"""Typed, columnar on-disk cache of cs-training.csv.
+
+The CSV is parsed once, each column is downcast to the smallest dtype that
+holds every value exactly and saved as its own .npy file next to a schema.json recording the
+source file's sha256. Later loads memory-map the columns instead of parsing
+text, and the cache is rebuilt only when the CSV's hash changes.
+"""
+import io
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from schema import file_sha256
+
+# 2: float columns stay float64 unless float32 holds every value exactly
+CACHE_VERSION = 2
+CACHE_ROOT = ".cache"
+
+# Counts fit in int8 (the 96/98 sentinels included); columns with missing
+# values, or fractional ones, use float32 when it is lossless and float64
+# otherwise, so training sees the same values serving parses from the CSV
+DTYPES = {
+    'ID': np.int32,
+    'SeriousDlqin2yrs': np.int8,
+    'RevolvingUtilizationOfUnsecuredLines': np.float32,
+    'age': np.int8,
+    'NumberOfTime30-59DaysPastDueNotWorse': np.int8,
+    'DebtRatio': np.float32,
+    'MonthlyIncome': np.float32,
+    'NumberOfOpenCreditLinesAndLoans': np.int8,
+    'NumberOfTimes90DaysLate': np.int8,
+    'NumberRealEstateLoansOrLines': np.int8,
+    'NumberOfTime60-89DaysPastDueNotWorse': np.int8,
+    'NumberOfDependents': np.float32,
+}
+
+
+def cache_dir_for(csv_path, root=CACHE_ROOT):
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(csv_path)), root, name)
+
+
+def _downcast(column, dtype):
+    """Cast to ``dtype`` if it holds every value exactly, otherwise to the next wider type."""
+    if np.issubdtype(dtype, np.integer):
+        if not column.isna().any():
+            for candidate in (dtype, np.int16, np.int32, np.int64):
+                info = np.iinfo(candidate)
+                if info.min <= column.min() and column.max() <= info.max:
+                    return column.to_numpy(dtype=candidate)
+        dtype = np.float32
+    values = column.to_numpy(dtype=np.float64)
+    narrow = values.astype(dtype)
+    # Ratios like 0.766126609 are not float32 values; keep them float64
+    if np.array_equal(narrow, values, equal_nan=True):
+        return narrow
+    return values
+
+
+def build_cache(csv_path, cache_dir=None, sha256=None):
+    """Parse ``csv_path`` once and write one .npy per column plus schema.json."""
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    sha256 = sha256 or file_sha256(csv_path)
+    df = pd.read_csv(csv_path).rename(columns={'Unnamed: 0': 'ID'})
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        values = _downcast(df[name], DTYPES.get(name, np.float64))
+        filename = f"{i:02d}.npy"
+        np.save(os.path.join(cache_dir, filename), values)
+        columns.append({'name': name, 'file': filename, 'dtype': values.dtype.str})
+
+    schema = {
+        'cache_version': CACHE_VERSION,
+        'source': os.path.basename(csv_path),
+        'source_sha256': sha256,
+        'rows': int(len(df)),
+        'columns': columns,
+    }
+    # schema.json is written last, so a half-built cache is never considered valid
+    with open(os.path.join(cache_dir, 'schema.json'), 'w') as f:
+        json.dump(schema, f, indent=2)
+    return schema
+
+
+def _read_schema(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'schema.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_training(csv_path='cs-training.csv', columns=None, cache_dir=None, verbose=False):
+    """Load the training data through the typed cache, building it if stale.
+
+    Returns a DataFrame whose columns are read-only memory maps of the cached
+    arrays, with 'Unnamed: 0' renamed to 'ID'.
+    """
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    schema = _read_schema(cache_dir)
+    sha256 = file_sha256(csv_path)
+    if schema is None or schema.get('cache_version') != CACHE_VERSION or schema['source_sha256'] != sha256:
+        start = time.perf_counter()
+        schema = build_cache(csv_path, cache_dir, sha256)
+        if verbose:
+            print(f"Built typed cache for {csv_path} in {cache_dir} ({time.perf_counter() - start:.2f}s).")
+
+    wanted = schema['columns'] if columns is None else [c for c in schema['columns'] if c['name'] in columns]
+    data = {c['name']: np.load(os.path.join(cache_dir, c['file']), mmap_mode='r') for c in wanted}
+    return pd.DataFrame(data, copy=False)
+
+
+def written_rows(batch):
+    """``batch`` as append_training() writes it: the CSV text, and that text parsed back.
+
+    pandas' CSV parser is not exact for 17-digit decimals, so a value can
+    come back one ulp away from the one written. The parsed frame holds what
+    every later reader of the CSV (and a rebuilt cache) will see.
+    """
+    text = batch.to_csv(header=False, index=False)
+    return text, pd.read_csv(io.StringIO(text), header=None, names=list(batch.columns))
+
+
+def append_training(batch, csv_path='cs-training.csv', cache_dir=None):
+    """Append labeled rows to the training CSV and extend its cache in place.
+
+    ``batch`` is a DataFrame in load_training() layout (an 'ID' column plus
+    the CSV's other columns). Only the new rows are parsed and downcast; the
+    cached columns are extended rather than rebuilt from the CSV, unless the
+    cache was already stale or a new value does not fit its column's dtype.
+    """
+    text, batch = written_rows(batch)
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    schema = _read_schema(cache_dir)
+    old_sha256 = file_sha256(csv_path)
+
+    with open(csv_path, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+        else:
+            needs_newline = False
+    with open(csv_path, 'a', newline='') as f:
+        if needs_newline:
+            f.write('\n')
+        f.write(text)
+    new_sha256 = file_sha256(csv_path)
+
+    if schema is None or schema.get('cache_version') != CACHE_VERSION or schema['source_sha256'] != old_sha256:
+        return build_cache(csv_path, cache_dir, new_sha256)
+
+    extended = []
+    for column in schema['columns']:
+        path = os.path.join(cache_dir, column['file'])
+        dtype = np.dtype(column['dtype'])
+        new = _downcast(batch[column['name']], dtype.type)
+        if new.dtype != dtype:
+            return build_cache(csv_path, cache_dir, new_sha256)
+        extended.append((path, np.concatenate([np.load(path), new])))
+    for path, values in extended:
+        np.save(path, values)
+
+    schema.update(source_sha256=new_sha256, rows=schema['rows'] + len(batch))
+    with open(os.path.join(cache_dir, 'schema.json'), 'w') as f:
+        json.dump(schema, f, indent=2)
+    return schema
@@ -0,0 +1,323 @@
+import threading
+import weakref
+from collections import deque
+
+import numpy as np
+
+import metrics
+from schema import FEATURES
+
+# Conventional PSI reading: < 0.1 stable, 0.1-0.2 moderate shift, > 0.2 major shift
+PSI_THRESHOLD = 0.2
+
+
+def quantile_edges(values, n_bins=10):
+    """Interior bin edges at the quantiles of ``values`` (NaNs ignored, duplicates dropped)."""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return np.array([])
+    return np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+
+
+def bin_counts(values, edges):
+    """Counts per bin, with missing values in an extra last bin."""
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    counts = np.bincount(np.searchsorted(edges, values[~missing], side='right'), minlength=len(edges) + 1)
+    return np.append(counts, missing.sum())
+
+
+def psi_from_counts(expected, actual, eps=1e-4):
+    """Population stability index between two count vectors over the same bins."""
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    e = np.clip(expected / max(expected.sum(), 1), eps, None)
+    a = np.clip(actual / max(actual.sum(), 1), eps, None)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def psi(expected, actual, n_bins=10):
+    """PSI of ``actual`` against ``expected``, binned at the expected quantiles."""
+    edges = quantile_edges(expected, n_bins)
+    return psi_from_counts(bin_counts(expected, edges), bin_counts(actual, edges))
+
+
+# --- Streaming monitor over scoring traffic ---
+
+# Percentile resolution of the baseline histograms; KS and the quantile
+# estimates are accurate to about one baseline percentile
+SKETCH_BINS = 100
+# Reports cover the most recent one to two windows of scored rows
+WINDOW_ROWS = 10000
+# Rows observed before a feature's drift status is reported
+MIN_ROWS = 500
+# Rows buffered before they are binned, in one vectorized step
+BUFFER_ROWS = 256
+# Rows waiting for the binning thread before an observe call bins them itself
+MAX_QUEUED_ROWS = 64 * BUFFER_ROWS
+
+
+def baseline(X, features=FEATURES):
+    """Reference histograms of raw training inputs, saved in the bundle manifest.
+
+    Per feature: interior edges at the percentiles of the non-missing values,
+    counts per bin (missing values last), the decile edges used for PSI (a
+    subset of the percentile edges) and the observed range.
+    """
+    out = {}
+    for name in features:
+        values = np.asarray(X[name], dtype=np.float64)
+        present = values[~np.isnan(values)]
+        if len(present):
+            percentiles = np.quantile(present, np.linspace(0, 1, SKETCH_BINS + 1)[1:-1])
+            edges, deciles = np.unique(percentiles), np.unique(percentiles[SKETCH_BINS // 10 - 1::SKETCH_BINS // 10])
+            low, high = float(present.min()), float(present.max())
+        else:
+            edges = deciles = np.array([])
+            low = high = None
+        out[name] = {
+            'edges': edges.tolist(),
+            'deciles': deciles.tolist(),
+            'counts': bin_counts(values, edges).tolist(),
+            'min': low,
+            'max': high,
+        }
+    return {'rows': len(X), 'features': out}
+
+
+def load_baseline(model_path, train_path="cs-training.csv"):
+    """Training baseline for a bundle or flat export; legacy models fall back to ``train_path``.
+
+    Returns None when neither the model nor the training data provides one.
+    """
+    import json
+    import os
+
+    if model_path.endswith('.npz'):
+        from flat_model import load_flat
+
+        found = load_flat(model_path).meta.get('drift_baseline')
+    else:
+        from bundle import manifest_path
+
+        found = None
+        if os.path.exists(manifest_path(model_path)):
+            with open(manifest_path(model_path)) as f:
+                found = json.load(f).get('drift_baseline')
+    if found:
+        return found
+    if os.path.exists(train_path):
+        from dataset import load_training
+
+        return baseline(load_training(train_path))
+    return None
+
+
+def _status(psi_value, rows):
+    if rows < MIN_ROWS:
+        return 'warming up'
+    if psi_value > PSI_THRESHOLD:
+        return 'major shift'
+    return 'moderate shift' if psi_value > 0.1 else 'stable'
+
+
+def _quantile(counts, edges, low, high, point_mass, q):
+    """Estimate the q-quantile from counts over [low, edges..., high].
+
+    Bins that held more than a percentile of the baseline are point masses
+    (np.unique merged their edges) and report their lower edge; the others
+    interpolate linearly.
+    """
+    total = counts.sum()
+    if not total or low is None:
+        return None
+    bounds = np.concatenate([[low], edges, [high]])
+    cumulative = np.cumsum(counts)
+    i = int(np.searchsorted(cumulative, q * total))
+    if point_mass[i]:
+        return float(bounds[i])
+    below = cumulative[i - 1] if i else 0
+    lower, upper = bounds[i], max(bounds[i + 1], bounds[i])
+    return float(lower + (upper - lower) * (q * total - below) / counts[i])
+
+
+class DriftMonitor:
+    """Constant-memory histograms of scored rows, compared with a training baseline.
+
+    Every feature is binned on its baseline percentiles, so one fixed array
+    of counts serves both as the histogram for PSI (grouped into deciles)
+    and as the quantile sketch for KS and median/p99 estimates. Counts
+    rotate every ``window`` rows so reports follow recent traffic.
+
+    ``observe`` and ``observe_batch`` only append to a queue (no lock); a
+    background thread bins them once ``BUFFER_ROWS`` rows are waiting, so the
+    scoring path never waits on it. Safe to share between threads.
+    """
+
+    def __init__(self, baseline, features=FEATURES, window=WINDOW_ROWS):
+        self.features = list(features)
+        self.window = window
+        self.baseline_rows = baseline['rows']
+        specs = [baseline['features'][name] for name in self.features]
+        self._specs = specs
+        self._edges = [np.asarray(spec['edges'], dtype=np.float64) for spec in specs]
+        # Columns: value bins 0..width, missing, outside the training range
+        width = max(len(edges) for edges in self._edges)
+        self._missing_col, self._range_col = width + 1, width + 2
+        self._expected = np.zeros((len(specs), width + 3))
+        for i, spec in enumerate(specs):
+            self._expected[i, :len(spec['edges']) + 1] = spec['counts'][:-1]
+            self._expected[i, self._missing_col] = spec['counts'][-1]
+        self._low = np.array([-np.inf if spec['min'] is None else spec['min'] for spec in specs])
+        self._high = np.array([np.inf if spec['max'] is None else spec['max'] for spec in specs])
+        self._current = np.zeros((len(specs), width + 3), dtype=np.int64)
+        self._previous = np.zeros_like(self._current)
+        self._current_rows = self._previous_rows = 0
+        self.rows_observed = 0
+        self._queue = deque()
+        self._blocks = deque()
+        self._block_rows = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._worker = None
+
+    def observe(self, row):
+        """Queue one raw row (sequence of floats in FEATURES order, NaN for missing)."""
+        self._queue.append(row)
+        queued = len(self._queue)
+        if queued >= BUFFER_ROWS:
+            if queued >= MAX_QUEUED_ROWS:
+                # The binning thread is starved; keep memory bounded
+                self._drain()
+            else:
+                self._wake_worker()
+
+    def observe_batch(self, X):
+        """Queue a 2-D array of raw rows; it must not be modified afterwards."""
+        X = np.asarray(X, dtype=np.float64)
+        self._blocks.append(X)
+        # Unlocked and approximate: only decides when to wake the binning thread
+        self._block_rows += len(X)
+        if self._block_rows >= MAX_QUEUED_ROWS:
+            # The binning thread is starved; keep memory bounded
+            self._drain()
+        elif self._block_rows >= BUFFER_ROWS:
+            self._wake_worker()
+
+    def _wake_worker(self):
+        if not self._wake.is_set():
+            if self._worker is None or not self._worker.is_alive():
+                self._start_worker()
+            self._wake.set()
+
+    def _start_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=_bin_queued, args=(weakref.ref(self), self._wake),
+                                                name='drift-monitor', daemon=True)
+                self._worker.start()
+
+    def _drain(self):
+        with self._lock:
+            self._block_rows = 0
+            while self._blocks:
+                block = self._blocks.popleft()
+                # Whole batches at once, split only where the window rotates
+                while len(block):
+                    take = self.window - self._current_rows
+                    self._fold(block[:take])
+                    block = block[take:]
+            while self._queue:
+                rows = [self._queue.popleft() for _ in range(min(len(self._queue), BUFFER_ROWS))]
+                self._fold(np.array(rows, dtype=np.float64).reshape(len(rows), -1))
+
+    def _fold(self, block):
+        counts = np.zeros_like(self._current)
+        missing = np.isnan(block).sum(axis=0)
+        # Sorting the block and locating the ~100 edges in it is several times
+        # cheaper than locating every value among the edges; NaNs sort last
+        ordered = np.sort(block, axis=0)
+        valid = len(block) - missing
+        for i, edges in enumerate(self._edges):
+            # below[k]: values < edges[k], so bin k holds edges[k-1] <= x < edges[k]
+            below = ordered[:, i].searchsorted(edges)
+            row, n = counts[i], len(edges)
+            row[0] = below[0]
+            row[1:n] = below[1:] - below[:-1]
+            row[n] = valid[i] - below[-1]
+        counts[:, self._missing_col] = missing
+        counts[:, self._range_col] = ((block < self._low) | (block > self._high)).sum(axis=0)
+        self._current += counts
+        self._current_rows += len(block)
+        self.rows_observed += len(block)
+        if self._current_rows >= self.window:
+            self._previous, self._current = self._current, np.zeros_like(self._current)
+            self._previous_rows, self._current_rows = self._current_rows, 0
+
+    def reset(self):
+        with self._lock:
+            self._queue.clear()
+            self._blocks.clear()
+            self._block_rows = 0
+            self._current[:] = 0
+            self._previous[:] = 0
+            self._current_rows = self._previous_rows = 0
+
+    def report(self):
+        """PSI, KS, missing and out-of-range rates and median/p99 per feature, JSON-ready.
+
+        Also published as ``drift_psi`` / ``drift_ks`` gauges in the metrics registry.
+        """
+        self._drain()
+        with self._lock:
+            counts = self._current + self._previous
+            rows = self._current_rows + self._previous_rows
+        features = {}
+        for i, (name, spec) in enumerate(zip(self.features, self._specs)):
+            n_edges = len(self._edges[i])
+            expected, actual = self._expected[i, :n_edges + 1], counts[i, :n_edges + 1]
+            expected_missing, actual_missing = self._expected[i, self._missing_col], counts[i, self._missing_col]
+            # Decile groups of the percentile bins, plus missing, as drift.psi bins them
+            groups = np.searchsorted(spec['deciles'], np.concatenate([[-np.inf], spec['edges']]), side='right')
+            expected_groups = np.append(np.bincount(groups, expected, len(spec['deciles']) + 1), expected_missing)
+            actual_groups = np.append(np.bincount(groups, actual, len(spec['deciles']) + 1), actual_missing)
+            value = psi_from_counts(expected_groups, actual_groups) if rows else None
+            ks = None
+            if actual.sum() and expected.sum():
+                ks = float(np.abs(np.cumsum(expected) / expected.sum() - np.cumsum(actual) / actual.sum()).max())
+            low, high = spec['min'], spec['max']
+            point_mass = expected / max(expected.sum(), 1) > 1.5 / SKETCH_BINS
+            features[name] = {
+                'psi': value,
+                'ks': ks,
+                'status': _status(value or 0.0, rows),
+                'missing_baseline': float(expected_missing / self.baseline_rows),
+                'missing': float(actual_missing / rows) if rows else None,
+                'out_of_range': float(counts[i, self._range_col] / rows) if rows else None,
+                'median_baseline': _quantile(expected, spec['edges'], low, high, point_mass, 0.5),
+                'median': _quantile(actual, spec['edges'], low, high, point_mass, 0.5),
+                'p99_baseline': _quantile(expected, spec['edges'], low, high, point_mass, 0.99),
+                'p99': _quantile(actual, spec['edges'], low, high, point_mass, 0.99),
+                'share_baseline': (expected_groups / max(expected_groups.sum(), 1)).tolist(),
+                'share': (actual_groups / max(actual_groups.sum(), 1)).tolist(),
+            }
+            if value is not None:
+                metrics.gauge('drift_psi', "PSI of recent scored rows against the training baseline.",
+                              feature=name).set(value)
+            if ks is not None:
+                metrics.gauge('drift_ks', "KS statistic of recent scored rows against the training baseline.",
+                              feature=name).set(ks)
+        return {'rows': rows, 'rows_observed': self.rows_observed, 'window': self.window, 'features': features}
+
+
+def _bin_queued(monitor_ref, wake):
+    # Background binning for DriftMonitor.observe; exits once the monitor is gone
+    while True:
+        wake.wait(timeout=5.0)
+        wake.clear()
+        monitor = monitor_ref()
+        if monitor is None:
+            return
+        monitor._drain()
+        del monitor
@@ -0,0 +1,217 @@
+"""Exact per-feature contributions (path-dependent TreeSHAP) for the boosted trees.
+
+For one leaf, whether a row "agrees" with the leaf only depends on which of the
+leaf path's k distinct features send the row down that path.
+The leaf's share of every feature's SHAP value is therefore a function of that
+agreement pattern alone, so ``TreeExplainer`` tabulates it once per leaf and
+pattern at load time, using the training-sample counts stored in each node as
+cover. Explaining a batch is then a vectorized pattern computation, a table
+gather and one matrix product, with no per-row Python.
+
+The table holds 2**k x k floats per leaf for the largest k of any leaf, so it
+grows exponentially with the number of distinct features on a path: fine for
+train.py's depth-5 trees (k <= 5), too large for deep unconstrained ones.
+Models whose table would exceed ``MAX_TABLE_BYTES`` are refused with a
+ValueError before anything is built.
+
+Contributions are in log-odds: ``expected_value + contributions.sum(axis=1)``
+equals the model's ``decision_function``.
+"""
+from math import factorial
+
+import numpy as np
+
+from schema import feature_names
+
+# Rows explained per block; bounds the (rows x leaves x k) temporaries
+BLOCK_ROWS = 64
+# Largest SHAP share table built (k = 8 over ~4,000 leaves is ~64 MiB)
+MAX_TABLE_BYTES = 64 * 2 ** 20
+
+# Underwriter-facing names for reason codes
+LABELS = {
+    'RevolvingUtilizationOfUnsecuredLines': "Revolving utilization",
+    'age': "Age",
+    'NumberOfTime30-59DaysPastDueNotWorse': "30-59 days late",
+    'DebtRatio': "Debt ratio",
+    'MonthlyIncome': "Monthly income",
+    'NumberOfOpenCreditLinesAndLoans': "Open credit lines",
+    'NumberOfTimes90DaysLate': "90+ days late",
+    'NumberRealEstateLoansOrLines': "Real estate loans",
+    'NumberOfTime60-89DaysPastDueNotWorse': "60-89 days late",
+    'NumberOfDependents': "Dependents",
+    'Total_Past_Due': "Total times past due",
+    'Income_Per_Dependent': "Income per dependent",
+    'Monthly_Debt_Absolute': "Monthly debt",
+    'MonthlyIncome_log': "Monthly income (log)",
+    'DebtRatio_log': "Debt ratio (log)",
+    'DebtRatio_Is_Absolute': "Debt reported as amount",
+}
+
+
+def _leaf_paths(nodes):
+    """Yield (leaf index, [(node, went_left), ...]) for every leaf of one tree."""
+    stack = [(0, [])]
+    while stack:
+        node, path = stack.pop()
+        if nodes['is_leaf'][node]:
+            yield node, path
+            continue
+        stack.append((nodes['right'][node], path + [(node, False)]))
+        stack.append((nodes['left'][node], path + [(node, True)]))
+
+
+def _shapley_tables(cover, value, k):
+    """SHAP share of each of k features, for every agreement pattern, for leaves with k features.
+
+    ``cover`` (leaves x k) holds, per distinct path feature, the product of
+    child/parent cover ratios along the path; ``value`` is the leaf value.
+    Returns (leaves x 2**k x k). Pattern bit j set means the row satisfies
+    every split on feature j along the path.
+    """
+    n_patterns = 2 ** k
+    bits = ((np.arange(n_patterns)[:, None] >> np.arange(k)) & 1).astype(np.float64)
+    table = np.zeros((len(cover), n_patterns, k))
+    for i in range(k):
+        others = [j for j in range(k) if j != i]
+        for subset in range(2 ** (k - 1)):
+            in_s = [j for b, j in enumerate(others) if subset >> b & 1]
+            weight = factorial(len(in_s)) * factorial(k - len(in_s) - 1) / factorial(k)
+            term = np.full((len(cover), n_patterns), weight)
+            for j in others:
+                term *= bits[None, :, j] if j in in_s else cover[:, j, None]
+            table[:, :, i] += term
+        table[:, :, i] *= (bits[None, :, i] - cover[:, i, None]) * value[:, None]
+    return table
+
+
+class TreeExplainer:
+    """Precomputed path-dependent TreeSHAP for a fitted scoring bundle."""
+
+    def __init__(self, pipeline):
+        self.preprocess = pipeline.named_steps['preprocess']
+        model = pipeline.named_steps['model']
+        if model.n_trees_per_iteration_ != 1:
+            raise ValueError("Only binary classifiers can be explained.")
+        if model.is_categorical_ is not None and model.is_categorical_.any():
+            raise ValueError("Categorical splits are not supported by the explainer.")
+        self.features = feature_names(self.preprocess.manifest())
+
+        leaves = []
+        splits = {}
+        expected = float(np.asarray(model._baseline_prediction).reshape(-1)[0])
+        for tree, predictors in enumerate(model._predictors):
+            nodes = predictors[0].nodes
+            root_count = float(nodes['count'][0])
+            for node in np.flatnonzero(nodes['is_leaf'] == 0):
+                splits[tree, node] = len(splits)
+            for leaf, path in _leaf_paths(nodes):
+                expected += nodes['value'][leaf] * nodes['count'][leaf] / root_count
+                leaves.append((tree, nodes, leaf, path))
+        self.expected_value = expected
+        self.depth = max(len(path) for _, _, _, path in leaves)
+        depth = max(self.depth, 1)
+
+        # Table width: the most distinct features on any one path
+        n = len(leaves)
+        k_of_leaf = np.array([len({nodes['feature_idx'][node] for node, _ in path})
+                              for _, nodes, _, path in leaves], dtype=np.intp)
+        width = max(int(k_of_leaf.max()), 1)
+        table_bytes = n * 2 ** width * width * 8
+        if table_bytes > MAX_TABLE_BYTES:
+            raise ValueError(f"Explanations would need a {table_bytes / 2 ** 20:,.0f} MiB table ({n:,} leaves, up to "
+                             f"{width} distinct features per path; the limit is {MAX_TABLE_BYTES / 2 ** 20:,.0f} MiB).")
+        self.width = width
+
+        # Every split is evaluated once per row; path steps then look up
+        # "went the other way" among [goes right | goes left | never]
+        n_splits = len(splits)
+        self._split_feature = np.empty(n_splits, dtype=np.intp)
+        self._split_threshold = np.empty(n_splits)
+        self._split_missing_left = np.empty(n_splits, dtype=bool)
+        for (tree, node), i in splits.items():
+            nodes = model._predictors[tree][0].nodes
+            self._split_feature[i] = nodes['feature_idx'][node]
+            self._split_threshold[i] = nodes['num_threshold'][node]
+            self._split_missing_left[i] = nodes['missing_go_to_left'][node]
+
+        # Slot-major (depth x leaves) so each step's lookups are contiguous;
+        # patterns are bit masks over a leaf's feature slots
+        mask_dtype = np.min_scalar_type((1 << width) - 1)
+        self._step = np.full((depth, n), 2 * n_splits, dtype=np.intp)
+        self._step_bit = np.zeros((depth, n), dtype=mask_dtype)
+        slot_features = np.full((n, width), -1, dtype=np.intp)
+        cover = np.ones((n, width))
+        value = np.empty(n)
+
+        for row, (tree, nodes, leaf, path) in enumerate(leaves):
+            slots = {}
+            for step, (node, went_left) in enumerate(path):
+                feature = int(nodes['feature_idx'][node])
+                slot = slots.setdefault(feature, len(slots))
+                child = nodes['left'][node] if went_left else nodes['right'][node]
+                self._step[step, row] = splits[tree, node] + (0 if went_left else n_splits)
+                self._step_bit[step, row] = 1 << slot
+                cover[row, slot] *= nodes['count'][child] / nodes['count'][node]
+            for feature, slot in slots.items():
+                slot_features[row, slot] = feature
+            value[row] = nodes['value'][leaf]
+        self._full_mask = ((1 << k_of_leaf) - 1).astype(mask_dtype)
+
+        # Leaf-major table of SHAP shares, one (width,)-float record per
+        # (leaf, pattern), viewed as opaque records so a gather copies whole rows
+        table = np.zeros((n, 2 ** width, width))
+        for k in np.unique(k_of_leaf):
+            idx = np.flatnonzero(k_of_leaf == k)
+            if k:
+                table[idx, :2 ** k, :k] = _shapley_tables(cover[idx, :k], value[idx], k)
+        self._table = table.reshape(-1).view(np.dtype((np.void, 8 * width)))
+        self._leaf_offset = np.arange(n) * 2 ** width
+
+        # Scatter matrix from (leaf, slot) to model feature; summing over it
+        # adds every tree's share for a feature
+        self._scatter = np.zeros((n * width, len(self.features)))
+        flat = slot_features.ravel()
+        self._scatter[np.flatnonzero(flat >= 0), flat[flat >= 0]] = 1.0
+
+    def _patterns(self, X):
+        """(rows x leaves) agreement patterns: bit j set if the row satisfies every split on slot j."""
+        x = X[:, self._split_feature]
+        goes_left = (x <= self._split_threshold) | (np.isnan(x) & self._split_missing_left)
+        deviates = np.concatenate([~goes_left, goes_left, np.zeros((len(X), 1), dtype=bool)], axis=1)
+        steps = np.take(deviates, self._step, axis=1)
+        failed = np.zeros((len(X), self._step.shape[1]), dtype=self._full_mask.dtype)
+        for step in range(len(self._step)):
+            failed |= steps[:, step] * self._step_bit[step]
+        return self._full_mask & ~failed
+
+    def shap_values(self, X):
+        """Per-feature log-odds contributions for preprocessed rows (n x model features)."""
+        X = np.asarray(X, dtype=np.float64)
+        out = np.empty((len(X), len(self.features)))
+        for start in range(0, len(X), BLOCK_ROWS):
+            block = X[start:start + BLOCK_ROWS]
+            shares = np.take(self._table, self._leaf_offset + self._patterns(block)).view(np.float64)
+            out[start:start + BLOCK_ROWS] = shares.reshape(len(block), -1) @ self._scatter
+        return out
+
+    def explain(self, X):
+        """Contributions for raw rows (DataFrame or array in FEATURES order), after preprocessing."""
+        return self.shap_values(self.preprocess.transform(X))
+
+    def top_drivers(self, contributions, values=None, n=3):
+        """The ``n`` largest-magnitude contributions of one row as dicts, strongest first.
+
+        ``values`` (the row's preprocessed model input) adds each feature's value.
+        """
+        drivers = []
+        for i in np.argsort(-np.abs(contributions))[:n]:
+            driver = {
+                'feature': self.features[i],
+                'label': LABELS.get(self.features[i], self.features[i]),
+                'contribution': float(contributions[i]),
+            }
+            if values is not None:
+                driver['value'] = float(values[i])
+            drivers.append(driver)
+        return drivers
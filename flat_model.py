@@ -0,0 +1,269 @@
+"""Array-backed evaluator for the boosted trees in model.joblib.
+
+``export_flat`` flattens every tree of the fitted HistGradientBoostingClassifier
+into contiguous node arrays and writes them, together with the fitted
+preprocessing statistics, to an uncompressed .npz. ``load_flat`` memory-maps
+that file and scores with NumPy alone: scikit-learn is only needed to export.
+
+``compact=True`` writes the traversal tables themselves instead: one uint8
+column per node (feature and missing-value direction), packed uint16/uint32
+child pairs, and one float32 per node holding the threshold or, for a leaf,
+its value. Loading then allocates nothing per process, so workers mapping the
+same file share a single copy through the page cache. Thresholds are rounded
+up, so a row only changes branch if it lies strictly between a threshold and
+its float32 rounding (within ~6e-8 relative); float32 leaf values move
+probabilities by ~1e-8 (see benchmarks/compact_model.py).
+"""
+import argparse
+import json
+import zipfile
+
+import numpy as np
+
+import metrics
+from schema import feature_names, transform_features
+
+FLAT_PATH = "model.npz"
+FLAT_VERSION = 1
+# Same model, traversal tables stored packed and in float32
+COMPACT_VERSION = 2
+
+# Rows evaluated per traversal block; keeps the (trees x rows) index arrays in cache
+BLOCK_ROWS = 1024
+
+_LOAD = metrics.histogram('model_load_seconds', "Loading a model file.", format='flat')
+_PREPROCESS = metrics.histogram('preprocess_seconds', "Raw rows to model input.", model='flat')
+_PREDICT = metrics.histogram('predict_seconds', "predict_proba on preprocessed rows.", model='flat')
+_ROWS = metrics.counter('predictions_total', "Rows scored.", model='flat')
+_ERRORS = metrics.counter('prediction_errors_total', "Scoring calls that raised.", model='flat')
+
+
+def export_flat(model_path="model.joblib", out_path=FLAT_PATH, compact=False):
+    """Flatten the trees of a scoring bundle into an .npz file (``compact``: packed, float32)."""
+    from bundle import load_bundle
+
+    pipeline, manifest = load_bundle(model_path)
+    model = pipeline.named_steps['model']
+    if model.n_trees_per_iteration_ != 1:
+        raise ValueError("Only binary classifiers can be flattened.")
+    if model.is_categorical_ is not None and model.is_categorical_.any():
+        raise ValueError("Categorical splits are not supported by the flat evaluator.")
+
+    trees = [predictors[0].nodes for predictors in model._predictors]
+    sizes = np.array([len(nodes) for nodes in trees])
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+    nodes = np.concatenate(trees)
+    offsets = np.repeat(roots, sizes)
+    index = np.arange(len(nodes), dtype=np.int32)
+
+    # Leaves point at themselves so every row can take the same number of steps
+    is_leaf = nodes['is_leaf'].astype(bool)
+    left = np.where(is_leaf, index, nodes['left'] + offsets).astype(np.int32)
+    right = np.where(is_leaf, index, nodes['right'] + offsets).astype(np.int32)
+
+    meta = {
+        'flat_version': COMPACT_VERSION if compact else FLAT_VERSION,
+        'source_sha256': manifest['sha256'],
+        # Columns the trees index: FEATURES, plus DERIVED_FEATURES if enabled
+        'features': feature_names(manifest['preprocessing']),
+        'preprocessing': manifest['preprocessing'],
+        'drift_baseline': manifest.get('drift_baseline'),
+    }
+    common = {
+        'roots': roots,
+        'depth': np.array([int(nodes['depth'].max())]),
+        'baseline': np.asarray(model._baseline_prediction, dtype=np.float64).reshape(-1),
+        'meta': np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+    }
+    if compact:
+        n_features = len(meta['features'])
+        if 2 * n_features > 256:
+            raise ValueError("The compact layout supports at most 128 features.")
+        children = np.empty(2 * len(nodes), dtype=np.uint16 if len(nodes) <= 2 ** 16 else np.uint32)
+        children[0::2] = left
+        children[1::2] = right
+        # Thresholds are midpoints of training values, so rows can sit exactly
+        # on one; round up so every x <= t still goes left (x <= float32 t)
+        threshold = nodes['num_threshold'].astype(np.float32)
+        threshold = np.where(threshold < nodes['num_threshold'],
+                             np.nextafter(threshold, np.float32(np.inf)), threshold)
+        # A leaf's children are itself, so its threshold is never read and
+        # the slot can hold the leaf value instead
+        node_value = np.where(is_leaf, nodes['value'].astype(np.float32), threshold)
+        np.savez(
+            out_path,
+            column=(nodes['feature_idx'] + n_features * nodes['missing_go_to_left']).astype(np.uint8),
+            children=children,
+            node_value=node_value,
+            **common,
+        )
+        return meta
+    np.savez(
+        out_path,
+        feature=nodes['feature_idx'].astype(np.int32),
+        threshold=nodes['num_threshold'].astype(np.float64),
+        left=left,
+        right=right,
+        value=np.where(is_leaf, nodes['value'], 0.0).astype(np.float64),
+        missing_left=nodes['missing_go_to_left'].astype(bool),
+        **common,
+    )
+    return meta
+
+
+def _mmap_npz(path):
+    """Map each array of an uncompressed .npz read-only, without copying it into memory."""
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, 'rb') as f:
+        for info in zf.infolist():
+            name = info.filename[:-len('.npy')]
+            if info.compress_type != zipfile.ZIP_STORED:
+                arrays[name] = np.load(zf.open(info))
+                continue
+            # Local file header: 30 fixed bytes, then the name and extra field
+            f.seek(info.header_offset + 26)
+            name_len, extra_len = np.frombuffer(f.read(4), dtype='<u2')
+            f.seek(info.header_offset + 30 + int(name_len) + int(extra_len))
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+            if not shape or 0 in shape:
+                arrays[name] = np.zeros(shape, dtype=dtype)
+                continue
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(),
+                                     shape=shape, order='F' if fortran else 'C')
+    return arrays
+
+
+def load_flat(path=FLAT_PATH, mmap=True):
+    """Load a flat model exported by ``export_flat``."""
+    with _LOAD.time():
+        if mmap:
+            arrays = _mmap_npz(path)
+        else:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+        return FlatModel(arrays)
+
+
+class FlatModel:
+    """Scores raw applicant rows by level-wise traversal of all trees at once.
+
+    Every row advances one level in every tree per step, so a batch takes
+    ``depth`` vectorized gathers instead of a Python loop over rows or trees.
+    Log-odds match scikit-learn exactly, NaNs included; probabilities can
+    differ in the last bit because NumPy's vectorized exp is not the libm one
+    sklearn uses.
+    Compact files route rows on or below a threshold as sklearn does; leaf
+    values are exact up to their float32 rounding.
+    """
+
+    def __init__(self, arrays):
+        self.meta = json.loads(bytes(arrays['meta']).decode())
+        if self.meta['flat_version'] not in (FLAT_VERSION, COMPACT_VERSION):
+            raise ValueError(f"Flat model version {self.meta['flat_version']}, expected "
+                             f"{FLAT_VERSION} or {COMPACT_VERSION}.")
+        self.compact = self.meta['flat_version'] == COMPACT_VERSION
+        self.roots = arrays['roots']
+        self.depth = int(arrays['depth'][0])
+        self.baseline = float(arrays['baseline'][0])
+        self.preprocessing = self.meta['preprocessing']
+        self._roots = np.asarray(self.roots, dtype=np.intp)
+
+        # Fused lookup tables for traversal. NaNs are routed by reading the
+        # feature from one of two copies of X, picked per node by its
+        # missing-value direction, and children are interleaved so the next
+        # node is children[2 * node + went_right]; see _leaves_block.
+        if self.compact:
+            # Stored ready to use; they stay in the shared mapping
+            self._column = arrays['column']
+            self._children = arrays['children']
+            self.threshold = self.value = arrays['node_value']
+            return
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.value = arrays['value']
+        self.missing_left = arrays['missing_left']
+        n_features = len(self.meta['features'])
+        self._column = (self.feature + n_features * self.missing_left).astype(np.intp)
+        self._children = np.empty(2 * len(self.left), dtype=np.intp)
+        self._children[0::2] = self.left
+        self._children[1::2] = self.right
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.threshold)
+
+    def transform(self, X):
+        """Apply the bundle's fitted preprocessing to raw rows."""
+        return transform_features(X, self.preprocessing)
+
+    def _leaves_block(self, X):
+        # sklearn goes left when x <= threshold and sends NaN by the node's
+        # flag. Nodes whose NaNs go left read a copy with NaN -> -inf; the
+        # others read X as is, where NaN <= t is False, so it goes right even
+        # on "split on missing" nodes (t = +inf) that a real +inf goes left on
+        n = len(X)
+        routed = np.hstack([X, np.where(np.isnan(X), -np.inf, X)]).ravel()
+        row_start = np.arange(0, routed.size, 2 * X.shape[1], dtype=np.intp)
+        node = np.repeat(self._roots[:, None], n, axis=1)
+        for _ in range(self.depth):
+            x = routed.take(row_start + self._column.take(node))
+            went_right = ~(x <= self.threshold.take(node))
+            node = self._children.take(2 * node + went_right).astype(np.intp, copy=False)
+        return node
+
+    def leaves(self, X):
+        """Leaf index reached in every tree, shape (n_rows, n_trees), for preprocessed X."""
+        blocks = [self._leaves_block(X[start:start + BLOCK_ROWS]) for start in range(0, len(X), BLOCK_ROWS)]
+        return np.hstack(blocks).T if blocks else np.empty((0, self.n_trees), dtype=np.intp)
+
+    def decision_function(self, X):
+        """Raw log-odds for preprocessed X, summed in the same order as scikit-learn."""
+        raw = np.full(len(X), self.baseline)
+        for start in range(0, len(X), BLOCK_ROWS):
+            values = self.value.take(self._leaves_block(X[start:start + BLOCK_ROWS]))
+            block = raw[start:start + BLOCK_ROWS]
+            for tree_values in values:
+                block += tree_values
+        return raw
+
+    def predict_proba(self, X):
+        """Class probabilities for raw rows (DataFrame or array in FEATURES order)."""
+        try:
+            with _PREPROCESS.time():
+                X = self.transform(X)
+            with _PREDICT.time():
+                p = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        except Exception:
+            _ERRORS.inc()
+            raise
+        _ROWS.inc(len(p))
+        return np.column_stack([1.0 - p, p])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export model.joblib to the flat .npz format.")
+    parser.add_argument('--model', default="model.joblib")
+    parser.add_argument('-o', '--output', default=FLAT_PATH)
+    parser.add_argument('--compact', action='store_true',
+                        help="Packed integer tables and float32 thresholds (rounded up) and leaf values (~1e-8 probability error).")
+    args = parser.parse_args()
+
+    meta = export_flat(args.model, args.output, args.compact)
+    flat = load_flat(args.output)
+    print(f"Exported {flat.n_trees} trees ({flat.n_nodes:,} nodes, depth {flat.depth}) "
+          f"from {args.model} (sha256 {meta['source_sha256'][:12]}) to {args.output}"
+          f"{' in the compact float32 layout' if flat.compact else ''}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""Low-overhead timing histograms and counters for the scoring hot paths.
+
+Every process has one registry. Hot paths create their metrics once at import
+time and time a block with ``with HISTOGRAM.time():``, which costs a
+perf_counter() pair, a bisect over 48 bucket bounds and a locked increment.
+The registry is exported as Prometheus text (``prometheus_text()``, or over
+HTTP with ``serve()``) or as a JSON-ready ``snapshot()``.
+
+``profile_once()`` wraps a request so that, once armed (``arm_profile()`` or
+the PROFILE_NEXT_REQUEST environment variable set to ``cprofile`` or
+``pyinstrument``), exactly one call is profiled and written to ``profiles/``.
+"""
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIX = "credit_"
+
+# Seconds: 10 us growing by sqrt(2) up to ~2 min, so sub-millisecond
+# predictions and multi-second model loads both land in meaningful buckets
+BUCKETS = tuple(round(1e-5 * 2 ** (i / 2), 9) for i in range(48))
+
+PROFILE_DIR = "profiles"
+
+# Set METRICS_DISABLED=1 to turn every timer into a no-op
+ENABLED = os.environ.get('METRICS_DISABLED', '') in ('', '0')
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics) with estimated quantiles."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels, buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.bounds = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def time(self):
+        """Context manager recording the block's wall time in seconds."""
+        return _Timer(self) if ENABLED else _NULL_TIMER
+
+    def quantile(self, q):
+        """Estimate the q-quantile by interpolating inside its bucket.
+
+        The bucket edges are tightened to the observed min/max, so small
+        samples (a single training run, say) report exact values.
+        """
+        with self._lock:
+            counts = list(self.counts)
+            total, low, high = self.count, self.min, self.max
+        if not total:
+            return math.nan
+        rank = q * total
+        seen = 0
+        for i, n in enumerate(counts):
+            if n and seen + n >= rank:
+                lower = max(self.bounds[i - 1] if i else 0.0, low)
+                upper = min(self.bounds[i] if i < len(self.bounds) else high, high)
+                if lower >= upper:
+                    return upper
+                fraction = max(rank - seen, 0) / n
+                # Buckets are geometric, so interpolate on a log scale when possible
+                if lower > 0:
+                    return lower * (upper / lower) ** fraction
+                return lower + (upper - lower) * fraction
+            seen += n
+        return high
+
+    def snapshot(self):
+        if not self.count:
+            # None rather than NaN, so the snapshot stays valid JSON
+            return {'count': 0, 'sum': 0.0, 'min': None, 'max': None, 'p50': None, 'p95': None, 'p99': None}
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+        }
+
+    def samples(self):
+        with self._lock:
+            counts = list(self.counts)
+            total, value_sum = self.count, self.sum
+        cumulative = 0
+        for bound, n in zip(self.bounds + (math.inf,), counts):
+            cumulative += n
+            yield '_bucket', dict(self.labels, le='+Inf' if bound == math.inf else f'{bound:.6g}'), cumulative
+        yield '_sum', self.labels, value_sum
+        yield '_count', self.labels, total
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        if ENABLED:
+            with self._lock:
+                self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+    def samples(self):
+        yield '', self.labels, self.value
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value):
+        self.value = value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, labels, **kwargs):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key) or self._metrics.setdefault(key, cls(name, help, labels, **kwargs))
+        if not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} already registered as a {metric.kind}.")
+        return metric
+
+    def histogram(self, name, help='', buckets=BUCKETS, **labels):
+        return self._get(Histogram, name, help, labels, buckets=buckets)
+
+    def counter(self, name, help='', **labels):
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name, help='', **labels):
+        return self._get(Gauge, name, help, labels)
+
+    def snapshot(self):
+        """{name: [{'labels': {...}, ...values}]}, ready for json.dumps."""
+        out = {}
+        for metric in list(self._metrics.values()):
+            value = metric.snapshot()
+            entry = dict(value) if isinstance(value, dict) else {'value': value}
+            out.setdefault(metric.name, []).append(dict(labels=metric.labels, **entry))
+        return out
+
+    def prometheus_text(self):
+        """Text exposition format 0.0.4."""
+        lines = []
+        seen = set()
+        for metric in sorted(self._metrics.values(), key=lambda m: m.name):
+            name = PREFIX + metric.name
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {metric.help}")
+                lines.append(f"# TYPE {name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                label_text = ','.join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{suffix}{{{label_text}}} {value}" if label_text else f"{name}{suffix} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+
+REGISTRY = Registry()
+histogram = REGISTRY.histogram
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+snapshot = REGISTRY.snapshot
+prometheus_text = REGISTRY.prometheus_text
+
+
+def format_summary(registry=REGISTRY):
+    """Human-readable table of every histogram and counter, for CLI output (``*_seconds`` in ms)."""
+    rows = []
+    for name, entries in sorted(registry.snapshot().items()):
+        for entry in entries:
+            if entry.get('count') == 0:
+                continue
+            labels = ','.join(f'{k}={v}' for k, v in entry['labels'].items())
+            label = f"{name}{{{labels}}}" if labels else name
+            if 'p50' in entry:
+                scale, unit = (1e3, ' ms') if name.endswith('_seconds') else (1, '')
+                rows.append(f"{label:<48} n={entry['count']:<7} " + "  ".join(
+                    f"{q}={entry[q] * scale:9.3f}{unit}" for q in ('p50', 'p95', 'p99')))
+            else:
+                rows.append(f"{label:<48} {entry['value']}")
+    return '\n'.join(rows)
+
+
+def serve(port, host='127.0.0.1'):
+    """Expose /metrics and /metrics.json on a daemon thread (for processes without an HTTP server)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                body, content_type = prometheus_text().encode(), 'text/plain; version=0.0.4'
+            elif self.path == '/metrics.json':
+                body, content_type = json.dumps(snapshot()).encode(), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+
+# --- One-shot profiling ---
+
+_profile = {'mode': None}
+_profile_lock = threading.Lock()
+
+
+def arm_profile(mode='cprofile'):
+    """Profile the next profile_once() block with 'cprofile' or 'pyinstrument'."""
+    if mode not in ('cprofile', 'pyinstrument'):
+        raise ValueError(f"Unknown profiler {mode!r}; use 'cprofile' or 'pyinstrument'.")
+    _profile['mode'] = mode
+
+
+@contextmanager
+def profile_once(name, out_dir=PROFILE_DIR):
+    """Profile this block if a capture is armed, then disarm; otherwise do nothing."""
+    if _profile['mode'] is None:
+        yield None
+        return
+    with _profile_lock:
+        mode, _profile['mode'] = _profile['mode'], None
+    if mode is None:
+        yield None
+        return
+
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.join(out_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+    if mode == 'pyinstrument':
+        # Optional dependency, only needed when this mode is requested
+        from pyinstrument import Profiler
+
+        profiler = Profiler(interval=0.0001)
+        profiler.start()
+        try:
+            yield stem + '.html'
+        finally:
+            profiler.stop()
+            with open(stem + '.html', 'w') as f:
+                f.write(profiler.output_html())
+    else:
+        import cProfile
+        import io
+        import pstats
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield stem + '.prof'
+        finally:
+            profiler.disable()
+            profiler.dump_stats(stem + '.prof')
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(25)
+            with open(stem + '.txt', 'w') as f:
+                f.write(text.getvalue())
+
+
+if os.environ.get('PROFILE_NEXT_REQUEST'):
+    arm_profile(os.environ['PROFILE_NEXT_REQUEST'])
@@ -0,0 +1,177 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+from schema import FEATURES
+
+_HITS = metrics.counter('prediction_cache_lookups_total', "Wizard prediction cache lookups.", result='hit')
+_MISSES = metrics.counter('prediction_cache_lookups_total', "Wizard prediction cache lookups.", result='miss')
+_SWEEP_HITS = metrics.counter('sweep_cache_lookups_total', "What-if sweep cache lookups.", result='hit')
+_SWEEP_MISSES = metrics.counter('sweep_cache_lookups_total', "What-if sweep cache lookups.", result='miss')
+
+# What-if grids kept per process; each is at most a few thousand floats
+SWEEP_ENTRIES = 64
+
+
+class PredictionCache:
+    """Process-wide LRU cache of default probabilities in front of the model.
+
+    Keys are the ten feature values (canonicalized to floats, in FEATURES
+    order) plus the sha256 of the loaded bundle. Before every lookup the model
+    file is stat()ed; if it changed on disk the model is reloaded and all
+    entries are dropped. Entries also expire ``ttl`` seconds after they are
+    stored (``ttl=None`` keeps them until evicted). Safe to share between
+    Streamlit session threads.
+
+    Lookups made with ``observe=True``, cached or not, also feed the profile
+    to ``monitor``, a drift.DriftMonitor against the model's training
+    baseline (None when the model has no baseline and cs-training.csv is
+    absent). The wizard passes it once per Analyze click, so reruns of the
+    results page don't count the same applicant again.
+
+    What-if sweeps (whatif.sweep) have their own smaller LRU, keyed the
+    same way plus the swept fields; they are not fed to the monitor since
+    the variants are not real applicants.
+    """
+
+    def __init__(self, model_path="model.joblib", maxsize=4096, ttl=3600.0):
+        self.model_path = model_path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reloads = 0
+        self._entries = OrderedDict()
+        self._sweeps = OrderedDict()
+        self._lock = threading.RLock()
+        self._file_state = None
+        # (FastPredictor, sha256) swapped as one object so readers never mix versions
+        self._model = (None, None)
+        self.monitor = None
+        self._reload_if_changed()
+
+    @property
+    def predictor(self):
+        return self._model[0]
+
+    @property
+    def model_sha256(self):
+        return self._model[1]
+
+    def _reload_if_changed(self):
+        stat = os.stat(self.model_path)
+        state = (stat.st_mtime_ns, stat.st_size)
+        if state == self._file_state:
+            return
+        with self._lock:
+            if state == self._file_state:
+                return
+            from bundle import load_bundle
+            from drift import DriftMonitor, load_baseline
+            from predictor import FastPredictor
+
+            model, manifest = load_bundle(self.model_path)
+            baseline = manifest.get('drift_baseline') or load_baseline(self.model_path)
+            self.monitor = DriftMonitor(baseline) if baseline else None
+            self._model = (FastPredictor(model), manifest['sha256'])
+            self._entries.clear()
+            self._sweeps.clear()
+            if self._file_state is not None:
+                self.reloads += 1
+            self._file_state = state
+
+    @staticmethod
+    def canonical(values, keys=FEATURES):
+        """Hashable form of a profile: floats in FEATURES order, NaN as None, -0.0 as 0.0."""
+        row = []
+        for key in keys:
+            value = float(values[key])
+            row.append(None if math.isnan(value) else value + 0.0)
+        return tuple(row)
+
+    def predict_mapping(self, values, keys=FEATURES, observe=True):
+        """Default probability for one applicant, from cache when possible."""
+        self._reload_if_changed()
+        predictor, sha256 = self._model
+        profile = self.canonical(values, keys)
+        key = (sha256, profile)
+        now = time.monotonic()
+        row = [math.nan if value is None else value for value in profile]
+        monitor = self.monitor
+        if observe and monitor is not None:
+            monitor.observe(row)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                _HITS.inc()
+                return entry[0]
+            self.misses += 1
+            _MISSES.inc()
+
+        prob = predictor.predict_row(row)
+
+        with self._lock:
+            if sha256 != self.model_sha256:
+                # The model was swapped while we were scoring; don't cache a stale result
+                return prob
+            self._entries[key] = (prob, None if self.ttl is None else now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return prob
+
+    def explain_mapping(self, values, keys=FEATURES, n=5):
+        """Top ``n`` drivers of one applicant's score from the current model (not cached)."""
+        self._reload_if_changed()
+        return self._model[0].explain_mapping(values, keys, n)
+
+    def sweep_mapping(self, values, keys=FEATURES, x='revolving_utilization', y=None):
+        """``whatif.sweep`` for one applicant, from cache when possible."""
+        self._reload_if_changed()
+        predictor, sha256 = self._model
+        key = (sha256, self.canonical(values, keys), x, y)
+        with self._lock:
+            result = self._sweeps.get(key)
+            if result is not None:
+                self._sweeps.move_to_end(key)
+                _SWEEP_HITS.inc()
+                return result
+            _SWEEP_MISSES.inc()
+
+        from whatif import sweep
+
+        result = sweep(predictor, values, keys, x, y)
+        with self._lock:
+            if sha256 == self.model_sha256:
+                self._sweeps[key] = result
+                while len(self._sweeps) > SWEEP_ENTRIES:
+                    self._sweeps.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sweeps.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'evictions': self.evictions,
+                'reloads': self.reloads,
+                'model_sha256': self.model_sha256,
+            }
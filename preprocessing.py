@@ -0,0 +1,80 @@
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+
+from schema import (
+    _IDX,
+    CLIP_UPPER,
+    DEFAULT_MEDIANS,
+    DELINQUENCY_COLS,
+    DELINQUENCY_SENTINELS,
+    FEATURES,
+    as_matrix,
+    feature_names,
+    transform_features,
+)
+
+
+class CreditPreprocessor(BaseEstimator, TransformerMixin):
+    """Imputation and outlier rules shared by training and every scorer.
+
+    Learns the MonthlyIncome / NumberOfDependents medians exactly as train.py
+    always has. With ``clip_outliers=True`` it also applies the notebook's
+    cleaning: age 0 becomes the median age, the 96/98 delinquency sentinels
+    become that column's most frequent real count, and RevolvingUtilization /
+    DebtRatio are clipped at 2 and 10. With ``derived_features=True`` the
+    notebook's engineered columns (DERIVED_FEATURES) are appended.
+
+    Accepts a DataFrame with the raw column names or an array already in
+    FEATURES order, and always returns a float64 array in FEATURES (then
+    DERIVED_FEATURES) order.
+    """
+
+    def __init__(self, clip_outliers=True, derived_features=False):
+        self.clip_outliers = clip_outliers
+        self.derived_features = derived_features
+
+    def __setstate__(self, state):
+        # Bundles pickled before derived features existed
+        state.setdefault('derived_features', False)
+        super().__setstate__(state)
+
+    def fit(self, X, y=None):
+        X = as_matrix(X)
+        self.medians_ = {col: float(np.nanmedian(X[:, _IDX[col]])) for col in DEFAULT_MEDIANS}
+        self.age_median_ = float(np.nanmedian(X[:, _IDX['age']]))
+        self.sentinel_fill_ = {}
+        for col in DELINQUENCY_COLS:
+            values = X[:, _IDX[col]]
+            values = values[~np.isnan(values) & ~np.isin(values, DELINQUENCY_SENTINELS)]
+            counts = np.unique(values, return_counts=True)
+            self.sentinel_fill_[col] = float(counts[0][np.argmax(counts[1])]) if len(values) else 0.0
+        self.n_features_in_ = len(FEATURES)
+        return self
+
+    @classmethod
+    def from_stats(cls, medians):
+        """Build an already-fitted, imputation-only preprocessor (legacy models)."""
+        pre = cls(clip_outliers=False)
+        pre.medians_ = dict(medians)
+        pre.age_median_ = None
+        pre.sentinel_fill_ = {}
+        pre.n_features_in_ = len(FEATURES)
+        return pre
+
+    def transform(self, X):
+        return transform_features(X, self.manifest())
+
+    def get_feature_names_out(self, input_features=None):
+        return np.array(feature_names(self.manifest()), dtype=object)
+
+    def manifest(self):
+        """Fitted statistics and rules, as recorded in the bundle manifest."""
+        return {
+            'clip_outliers': self.clip_outliers,
+            'derived_features': self.derived_features,
+            'medians': self.medians_,
+            'age_zero_fill': self.age_median_,
+            'delinquency_sentinels': DELINQUENCY_SENTINELS,
+            'sentinel_fill': self.sentinel_fill_,
+            'clip_upper': CLIP_UPPER,
+        }
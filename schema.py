@@ -0,0 +1,157 @@
+"""Feature schema, preprocessing rules and shared helpers, importable without scikit-learn."""
+import hashlib
+
+import numpy as np
+
+# Feature order the model is fitted on (cs-training.csv minus 'Unnamed: 0' and the target)
+FEATURES = [
+    'RevolvingUtilizationOfUnsecuredLines',
+    'age',
+    'NumberOfTime30-59DaysPastDueNotWorse',
+    'DebtRatio',
+    'MonthlyIncome',
+    'NumberOfOpenCreditLinesAndLoans',
+    'NumberOfTimes90DaysLate',
+    'NumberRealEstateLoansOrLines',
+    'NumberOfTime60-89DaysPastDueNotWorse',
+    'NumberOfDependents',
+]
+
+# Derived features from project.ipynb, appended after FEATURES when a
+# preprocessor is fitted with derived_features=True
+DERIVED_FEATURES = [
+    'Total_Past_Due',
+    'Income_Per_Dependent',
+    'Monthly_Debt_Absolute',
+    'MonthlyIncome_log',
+    'DebtRatio_log',
+    'DebtRatio_Is_Absolute',
+]
+
+# Risk Assessment wizard (app.py) form_data keys, in FEATURES order
+FORM_KEYS = [
+    'revolving_utilization',
+    'age',
+    'past_due_30_59',
+    'debt_ratio',
+    'monthly_income',
+    'open_lines',
+    'past_due_90_plus',
+    'real_estate_lines',
+    'past_due_60_89',
+    'dependents',
+]
+
+DELINQUENCY_COLS = [
+    'NumberOfTime30-59DaysPastDueNotWorse',
+    'NumberOfTimes90DaysLate',
+    'NumberOfTime60-89DaysPastDueNotWorse',
+]
+
+# Reporting codes in the delinquency counts, not real counts (see project.ipynb)
+DELINQUENCY_SENTINELS = [96, 98]
+
+# Upper clipping bounds from project.ipynb
+CLIP_UPPER = {
+    'RevolvingUtilizationOfUnsecuredLines': 2.0,
+    'DebtRatio': 10.0,
+}
+
+# Medians of the full cs-training.csv, for models saved before the bundle existed
+DEFAULT_MEDIANS = {'MonthlyIncome': 5400.0, 'NumberOfDependents': 0.0}
+
+_IDX = {name: i for i, name in enumerate(FEATURES)}
+
+
+def as_matrix(X, out=None):
+    """Return a float64 copy of X in FEATURES order (DataFrames are reordered by name).
+
+    With ``out`` (an (n, >= len(FEATURES)) float64 array) the values are
+    written into its first columns instead, column by column for DataFrames,
+    so no reordered intermediate frame is built.
+    """
+    if out is None:
+        if hasattr(X, 'columns'):
+            return X[FEATURES].to_numpy(dtype=np.float64, copy=True)
+        return np.array(X, dtype=np.float64, ndmin=2)
+    if hasattr(X, 'columns'):
+        for i, name in enumerate(FEATURES):
+            out[:, i] = X[name].to_numpy()
+    else:
+        out[:, :len(FEATURES)] = np.asarray(X, dtype=np.float64).reshape(-1, len(FEATURES))
+    return out[:, :len(FEATURES)]
+
+
+def feature_names(stats):
+    """Column names produced by transform_features() under ``stats``."""
+    return FEATURES + DERIVED_FEATURES if stats.get('derived_features') else list(FEATURES)
+
+
+def apply_rules(X, stats):
+    """Apply fitted preprocessing statistics to a float array in place.
+
+    ``stats`` is the mapping produced by ``CreditPreprocessor.manifest()``;
+    it is also stored in the flat model export, which is why this lives
+    outside the sklearn transformer.
+    """
+    for col, median in stats['medians'].items():
+        column = X[:, _IDX[col]]
+        column[np.isnan(column)] = median
+    if stats['clip_outliers']:
+        age = X[:, _IDX['age']]
+        age[age == 0] = stats['age_zero_fill']
+        for col, fill in stats['sentinel_fill'].items():
+            column = X[:, _IDX[col]]
+            column[np.isin(column, DELINQUENCY_SENTINELS)] = fill
+        for col, upper in CLIP_UPPER.items():
+            np.minimum(X[:, _IDX[col]], upper, out=X[:, _IDX[col]])
+    return X
+
+
+def derive_features(X, out):
+    """Fill ``out`` (n x len(DERIVED_FEATURES)) from cleaned rows ``X`` in FEATURES order.
+
+    ``out[:, -1]`` (DebtRatio_Is_Absolute) must already hold the flag, since
+    it is taken from DebtRatio before clipping.
+    """
+    total_past_due, per_dependent, debt_absolute, income_log, debt_log = (out[:, i] for i in range(5))
+    np.add(X[:, _IDX['NumberOfTime30-59DaysPastDueNotWorse']], X[:, _IDX['NumberOfTime60-89DaysPastDueNotWorse']], out=total_past_due)
+    np.add(total_past_due, X[:, _IDX['NumberOfTimes90DaysLate']], out=total_past_due)
+    np.add(X[:, _IDX['NumberOfDependents']], 1.0, out=per_dependent)
+    np.divide(X[:, _IDX['MonthlyIncome']], per_dependent, out=per_dependent)
+    np.multiply(X[:, _IDX['DebtRatio']], X[:, _IDX['MonthlyIncome']], out=debt_absolute)
+    np.log1p(X[:, _IDX['MonthlyIncome']], out=income_log)
+    np.log1p(X[:, _IDX['DebtRatio']], out=debt_log)
+    return out
+
+
+def transform_features(X, stats):
+    """Raw rows to model input: copy, apply_rules() and, if enabled, the derived features.
+
+    The single preprocessing path behind training, batch scoring, the wizard
+    and the flat model. Everything is column-wise NumPy on one preallocated
+    float64 array, which holds FEATURES followed by DERIVED_FEATURES.
+    """
+    if not stats.get('derived_features'):
+        return apply_rules(as_matrix(X), stats)
+    n = len(X) if hasattr(X, 'columns') else np.asarray(X).reshape(-1, len(FEATURES)).shape[0]
+    # Column-major, so every column operation runs over contiguous memory and
+    # NumPy never sees overlapping input/output (which switches it to a
+    # buffered loop whose log1p can differ in the last bit)
+    out = np.empty((n, len(FEATURES) + len(DERIVED_FEATURES)), dtype=np.float64, order='F')
+    base = as_matrix(X, out)
+    derived = out[:, len(FEATURES):]
+    # project.ipynb flags DebtRatio > 10 before clipping it at that value
+    np.greater(base[:, _IDX['DebtRatio']], CLIP_UPPER['DebtRatio'], out=derived[:, -1])
+    apply_rules(base, stats)
+    derive_features(base, derived)
+    return out
+
+
+def file_sha256(path):
+    """Hex sha256 of a file, read in 1 MiB blocks (model bundles and the training CSV cache)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,276 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from flat_model import load_flat
+
+OUTPUT_COLUMNS = ['Id', 'Probability']
+
+
+def load_model(model_path):
+    """Load a scoring bundle, or a flat .npz export (no scikit-learn needed)."""
+    if model_path.endswith('.npz'):
+        model = load_flat(model_path)
+        return model, f"flat export of {model.meta['source_sha256'][:12]}"
+    # Imported here so flat-model scoring never pulls in scikit-learn
+    from bundle import load_bundle
+
+    model, manifest = load_bundle(model_path)
+    return model, f"bundle v{manifest['bundle_version']} ({'legacy' if manifest['legacy'] else manifest['created_at']})"
+
+
+def write_header(out, columns=OUTPUT_COLUMNS):
+    """Write a CSV header line, so even an input with no rows gets a well-formed output."""
+    pd.DataFrame(columns=columns).to_csv(out, index=False)
+
+
+def score_chunk(model, chunk):
+    """Score a raw chunk through the bundle and return an Id/Probability frame."""
+    ids = chunk.iloc[:, 0] if 'Id' not in chunk.columns else chunk['Id']
+    return pd.DataFrame({
+        'Id': ids.to_numpy(),
+        'Probability': model.predict_proba(chunk)[:, 1].round(9),
+    })
+
+
+def explain_columns(explainer, reasons=3):
+    """Header of explain_chunk()'s output."""
+    return ['Id', *explainer.features, *(f'reason_{i + 1}' for i in range(reasons))]
+
+
+def explain_chunk(explainer, chunk, reasons=3):
+    """Per-feature log-odds contributions and top risk-raising reason codes for a raw chunk."""
+    import numpy as np
+
+    from explain import LABELS
+
+    ids = chunk.iloc[:, 0] if 'Id' not in chunk.columns else chunk['Id']
+    contributions = explainer.explain(chunk)
+    result = pd.DataFrame(contributions, columns=explainer.features)
+    result.insert(0, 'Id', ids.to_numpy())
+    labels = np.array([LABELS.get(name, name) for name in explainer.features] + [''], dtype=object)
+    # Strongest risk-raising features first; blank when fewer than `reasons` raise risk
+    order = np.argsort(-contributions, axis=1, kind='stable')[:, :reasons]
+    raising = np.take_along_axis(contributions, order, axis=1) > 0
+    codes = labels[np.where(raising, order, len(explainer.features))]
+    for i in range(reasons):
+        result[f'reason_{i + 1}'] = codes[:, i]
+    return result
+
+
+def score_file(model, input_path, output_path, chunksize=50000, explain_path=None, explainer=None):
+    """Stream input_path through the model, appending results to output_path.
+
+    With ``explain_path``, per-feature contributions and reason codes for
+    every row are written there too (bundles only), by ``explainer`` if given.
+    """
+    rows = 0
+    if not explain_path:
+        explainer = None
+    elif explainer is None:
+        from explain import TreeExplainer
+
+        explainer = TreeExplainer(model)
+    with open(output_path, 'w', newline='') as out, \
+            open(explain_path or os.devnull, 'w', newline='') as explained:
+        write_header(out)
+        if explainer is not None:
+            write_header(explained, explain_columns(explainer))
+        for chunk in pd.read_csv(input_path, chunksize=chunksize):
+            # A header-only file still yields one empty chunk, which the model rejects
+            if not len(chunk):
+                continue
+            result = score_chunk(model, chunk)
+            result.to_csv(out, index=False, header=False)
+            if explainer is not None:
+                explain_chunk(explainer, chunk).round(6).to_csv(explained, index=False, header=False)
+            rows += len(result)
+    return rows
+
+
+# Per-process state, populated once by _init_worker
+_worker = {}
+
+
+class _ByteRange:
+    """Read-only view of a file that stops at a given byte offset."""
+
+    def __init__(self, f, end):
+        self.f = f
+        self.end = end
+
+    def read(self, size=-1):
+        remaining = max(self.end - self.f.tell(), 0)
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        return self.f.read(size)
+
+    def __iter__(self):
+        return iter(lambda: self.readline(), b'')
+
+    def readline(self):
+        if self.f.tell() >= self.end:
+            return b''
+        return self.f.readline()
+
+
+def split_ranges(input_path, n_shards):
+    """Split the data rows of a CSV into byte ranges aligned to line boundaries."""
+    size = os.path.getsize(input_path)
+    with open(input_path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        bounds = [data_start]
+        for i in range(1, n_shards):
+            f.seek(data_start + (size - data_start) * i // n_shards)
+            f.readline()
+            bounds.append(max(f.tell(), bounds[-1]))
+    bounds.append(size)
+    columns = header.decode().rstrip('\r\n').split(',')
+    return columns, [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _init_worker(model_path):
+    # Imported here so the score.py module itself needs only NumPy and pandas
+    # for .npz exports; threadpoolctl ships with scikit-learn
+    from threadpoolctl import threadpool_limits
+
+    _worker['model'], _ = load_model(model_path)
+    # One OpenMP thread per process; parallelism comes from the pool itself
+    _worker['limits'] = threadpool_limits(limits=1)
+
+
+def _score_shard(input_path, columns, start, end, shard_path, chunksize):
+    rows = 0
+    with open(input_path, 'rb') as f, open(shard_path, 'w', newline='') as out:
+        f.seek(start)
+        reader = pd.read_csv(_ByteRange(f, end), header=None, names=columns, chunksize=chunksize)
+        for chunk in reader:
+            if not len(chunk):
+                continue
+            result = score_chunk(_worker['model'], chunk)
+            result.to_csv(out, index=False, header=False)
+            rows += len(result)
+    return rows
+
+
+def score_file_parallel(model_path, input_path, output_path, workers, chunksize=50000):
+    """Score row ranges of input_path in a process pool and merge them in Id order."""
+    columns, ranges = split_ranges(input_path, workers)
+    shard_dir = tempfile.mkdtemp(prefix='score-shards-')
+    shard_paths = [os.path.join(shard_dir, f'shard-{i:04d}.csv') for i in range(len(ranges))]
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(model_path,)) as pool:
+            futures = [
+                pool.submit(_score_shard, input_path, columns, start, end, shard_path, chunksize)
+                for (start, end), shard_path in zip(ranges, shard_paths)
+            ]
+            rows = sum(future.result() for future in futures)
+
+        # Shards cover consecutive row ranges, so concatenating them keeps the input order
+        with open(output_path, 'w', newline='') as out:
+            write_header(out)
+            for shard_path in shard_paths:
+                with open(shard_path) as shard:
+                    shutil.copyfileobj(shard, out)
+    finally:
+        shutil.rmtree(shard_dir, ignore_errors=True)
+    return rows
+
+
+def _written(path):
+    """Contents of a scratch output, which is then removed."""
+    with open(path, 'rb') as f:
+        content = f.read()
+    os.remove(path)
+    return content
+
+
+def scaling_report(args, model):
+    """Time the same file at 1, 2, 4 and all-core worker counts and check outputs match.
+
+    Parallel output must equal sequential output byte for byte, including
+    for an input with a header and no rows.
+    """
+    counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    reference_path = f"{args.output}.sequential"
+    score_file(model, args.input, reference_path, args.chunksize)
+    reference = _written(reference_path)
+
+    baseline = None
+    print(f"\n{'Workers':>8} {'Seconds':>9} {'Rows/sec':>12} {'Speedup':>8}  Identical")
+    for workers in counts:
+        output = f"{args.output}.w{workers}"
+        start = time.perf_counter()
+        rows = score_file_parallel(args.model, args.input, output, workers, args.chunksize)
+        elapsed = time.perf_counter() - start
+        content = _written(output)
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>9.2f} {rows / elapsed:>12,.0f} {baseline / elapsed:>7.2f}x  {content == reference}")
+
+    empty_path = f"{args.output}.header-only.csv"
+    with open(args.input, 'rb') as f, open(empty_path, 'wb') as empty:
+        empty.write(f.readline())
+    try:
+        score_file(model, empty_path, reference_path, args.chunksize)
+        score_file_parallel(args.model, empty_path, output, max(counts), args.chunksize)
+        same = _written(output) == _written(reference_path)
+    finally:
+        os.remove(empty_path)
+    print(f"{'header-only input':<40}  {same}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-score applicants into a sampleEntry.csv-style file.")
+    parser.add_argument('input', nargs='?', default='cs-test.csv', help="CSV of applicants to score.")
+    parser.add_argument('-o', '--output', default='submission.csv', help="Where to write Id,Probability.")
+    parser.add_argument('--model', default='model.joblib', help="Scoring bundle from train.py, or a flat .npz export.")
+    parser.add_argument('--chunksize', type=int, default=50000, help="Rows read and scored per block.")
+    parser.add_argument('-j', '--workers', type=int, default=1, help="Scoring processes; 0 uses every core.")
+    parser.add_argument('--scaling-report', action='store_true',
+                        help="Benchmark 1, 2, 4 and all-core workers instead of writing a single output.")
+    parser.add_argument('--explain', metavar='PATH',
+                        help="Also write per-feature contributions and top-3 reason codes per row to PATH.")
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count() or 1
+    if args.explain and (workers > 1 or args.model.endswith('.npz')):
+        parser.error("--explain needs a scoring bundle (not a .npz export) and a single worker.")
+
+    print(f"Loading model from {args.model}...")
+    model, description = load_model(args.model)
+    print(f"Loaded {description}.")
+    explainer = None
+    if args.explain:
+        from explain import TreeExplainer
+
+        try:
+            explainer = TreeExplainer(model)
+        except ValueError as exc:
+            parser.error(f"--explain: {exc}")
+
+    if args.scaling_report:
+        scaling_report(args, model)
+        return
+
+    print(f"Scoring {args.input} in chunks of {args.chunksize:,} rows with {workers} worker(s)...")
+    start = time.perf_counter()
+    if workers > 1:
+        rows = score_file_parallel(args.model, args.input, args.output, workers, args.chunksize)
+    else:
+        rows = score_file(model, args.input, args.output, args.chunksize, args.explain, explainer)
+    elapsed = time.perf_counter() - start
+
+    print(f"Scored {rows:,} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/sec).")
+    print(f"Predictions saved to {args.output}")
+    if args.explain:
+        print(f"Explanations saved to {args.explain} (log-odds contributions; with the expected log-odds they sum to each row's score)")
+
+
+if __name__ == "__main__":
+    main()
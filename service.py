@@ -0,0 +1,297 @@
+"""HTTP scoring service for systems that can't drive the Streamlit app.
+
+    python service.py                              # http://127.0.0.1:8000, 2 ms batching window
+    python service.py --port 9000 --batch-window-ms 0    # no micro-batching
+
+    POST /score          {"revolving_utilization": 0.3, "age": 35, ...}  -> {"probability": 0.068}
+    POST /score/batch    [{...}, {...}, ...]                           -> {"probabilities": [...]}
+    GET  /health         model, batching settings and counters
+    GET  /metrics        Prometheus text (/metrics.json for a JSON snapshot)
+    GET  /drift          PSI/KS and data-quality report of recent traffic vs the training data
+
+Applicant fields are the Risk Assessment wizard's keys (schema.FORM_KEYS);
+null means missing. The model is loaded once at startup. Concurrent /score
+requests that arrive within the batching window are scored together in one
+predict_proba call, on a single worker thread so the event loop keeps
+accepting requests meanwhile. Scored rows are then queued for a
+drift.DriftMonitor, whose own thread bins them off the request path.
+
+``--profile cprofile`` (or ``pyinstrument``) writes a profile of the first
+scored request's model call to profiles/.
+"""
+import argparse
+import asyncio
+import math
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import numpy as np
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+import metrics
+from drift import DriftMonitor, load_baseline
+from schema import FORM_KEYS
+from score import load_model
+
+BATCH_WINDOW_MS = 2.0
+MAX_BATCH = 256
+# Largest array accepted by /score/batch; bigger jobs belong in score.py
+MAX_BATCH_ROWS = 10000
+
+_BATCH_ROWS = metrics.histogram('service_batch_rows', "Rows per coalesced /score model call.",
+                                buckets=tuple(2 ** i for i in range(10)))
+_INVALID = metrics.counter('service_invalid_requests_total', "Requests rejected with 4xx.")
+
+
+def scoring_call(score_rows, monitor=None):
+    """The executor's model call: score a batch, then queue its rows for ``monitor``."""
+    def predict(X):
+        with metrics.profile_once('service_score'):
+            probs = score_rows(X)
+        if monitor is not None:
+            # Only a queue append; binning happens on the monitor's thread
+            monitor.observe_batch(X)
+        return probs
+    return predict
+
+
+def _request_timer(endpoint):
+    return metrics.histogram('service_request_seconds', "Request handling time, including batching wait.",
+                             endpoint=endpoint)
+
+
+class MicroBatcher:
+    """Coalesce single-row requests into one model call per ``window`` seconds.
+
+    The first queued row opens a window; rows arriving before it closes (or
+    until ``max_batch`` rows are collected) are stacked and scored together.
+    """
+
+    def __init__(self, predict, executor, window=BATCH_WINDOW_MS / 1000, max_batch=MAX_BATCH):
+        self.predict = predict
+        self.executor = executor
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.rows = 0
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def submit(self, row):
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((row, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            X = np.array([row for row, _ in batch], dtype=np.float64)
+            try:
+                probs = await loop.run_in_executor(self.executor, self.predict, X)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.batches += 1
+            self.rows += len(batch)
+            _BATCH_ROWS.observe(len(batch))
+            for (_, future), prob in zip(batch, probs):
+                # The client may have disconnected and cancelled its request
+                if not future.done():
+                    future.set_result(float(prob))
+
+
+def parse_applicant(data):
+    """Wizard-keyed JSON object -> list of floats in FEATURES order (None -> NaN)."""
+    if not isinstance(data, dict):
+        raise ValueError("Each applicant must be a JSON object.")
+    missing = [key for key in FORM_KEYS if key not in data]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    row = []
+    for key in FORM_KEYS:
+        value = data[key]
+        if value is None:
+            row.append(math.nan)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            row.append(float(value))
+        else:
+            raise ValueError(f"Field '{key}' must be a number or null.")
+    return row
+
+
+def error(message, status_code=422):
+    _INVALID.inc()
+    return JSONResponse({'error': message}, status_code=status_code)
+
+
+def create_app(model_path="model.joblib", batch_window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH):
+    """Build the Starlette app; the model loads when the server starts."""
+    state = {}
+    score_timer = _request_timer('/score')
+    batch_timer = _request_timer('/score/batch')
+
+    async def read_json(request):
+        try:
+            return await request.json()
+        except ValueError:
+            raise ValueError("Request body is not valid JSON.")
+
+    async def score(request):
+        with score_timer.time():
+            return await _score(request)
+
+    async def _score(request):
+        try:
+            row = parse_applicant(await read_json(request))
+        except ValueError as exc:
+            return error(str(exc))
+        if state['batcher'] is not None:
+            prob = await state['batcher'].submit(row)
+        else:
+            X = np.array([row], dtype=np.float64)
+            prob = float((await asyncio.get_running_loop().run_in_executor(state['executor'], state['predict'], X))[0])
+        return JSONResponse({'probability': prob})
+
+    async def score_batch(request):
+        with batch_timer.time():
+            return await _score_batch(request)
+
+    async def _score_batch(request):
+        try:
+            data = await read_json(request)
+            if not isinstance(data, list):
+                raise ValueError("Body must be a JSON array of applicants.")
+            rows = [parse_applicant(item) for item in data]
+        except ValueError as exc:
+            return error(str(exc))
+        if len(rows) > MAX_BATCH_ROWS:
+            return error(f"At most {MAX_BATCH_ROWS} applicants per request; use score.py for files.", 413)
+        if not rows:
+            return JSONResponse({'probabilities': []})
+        X = np.array(rows, dtype=np.float64)
+        probs = await asyncio.get_running_loop().run_in_executor(state['executor'], state['predict'], X)
+        return JSONResponse({'probabilities': probs.tolist()})
+
+    async def health(request):
+        batcher = state['batcher']
+        return JSONResponse({
+            'model': state['description'],
+            'batching': batcher is not None,
+            'batch_window_ms': batch_window_ms if batcher else 0,
+            'max_batch': max_batch if batcher else 1,
+            'batches': batcher.batches if batcher else None,
+            'mean_batch_size': batcher.rows / batcher.batches if batcher and batcher.batches else None,
+        })
+
+    async def prometheus(request):
+        if state['monitor'] is not None:
+            # Refreshes the drift_psi / drift_ks gauges
+            state['monitor'].report()
+        return PlainTextResponse(metrics.prometheus_text(), media_type='text/plain; version=0.0.4')
+
+    async def drift(request):
+        if state['monitor'] is None:
+            return JSONResponse({'error': "No training baseline for this model; retrain with train.py."},
+                                status_code=404)
+        return JSONResponse(state['monitor'].report())
+
+    async def metrics_json(request):
+        return JSONResponse(metrics.snapshot())
+
+    @asynccontextmanager
+    async def lifespan(app):
+        model, state['description'] = load_model(model_path)
+        if hasattr(model, 'named_steps'):
+            from predictor import FastPredictor
+
+            score_rows = FastPredictor(model).predict_batch
+        else:
+            score_rows = lambda X: model.predict_proba(X)[:, 1]
+
+        baseline = load_baseline(model_path)
+        state['monitor'] = monitor = DriftMonitor(baseline) if baseline else None
+
+        # Warm up so the first request doesn't pay for lazy initialisation
+        # (directly, so an armed profile still captures a real request)
+        score_rows(np.zeros((1, len(FORM_KEYS))))
+        state['predict'] = scoring_call(score_rows, monitor)
+        state['executor'] = ThreadPoolExecutor(max_workers=1)
+        state['batcher'] = None
+        if batch_window_ms > 0:
+            state['batcher'] = MicroBatcher(state['predict'], state['executor'], batch_window_ms / 1000, max_batch)
+            state['batcher'].start()
+        yield
+        if state['batcher'] is not None:
+            await state['batcher'].stop()
+        state['executor'].shutdown()
+
+    return Starlette(
+        routes=[
+            Route('/score', score, methods=['POST']),
+            Route('/score/batch', score_batch, methods=['POST']),
+            Route('/health', health, methods=['GET']),
+            Route('/metrics', prometheus, methods=['GET']),
+            Route('/metrics.json', metrics_json, methods=['GET']),
+            Route('/drift', drift, methods=['GET']),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP scoring service with request micro-batching.")
+    parser.add_argument('--model', default="model.joblib", help="Scoring bundle or flat .npz export.")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--batch-window-ms', type=float, default=BATCH_WINDOW_MS,
+                        help="How long a /score request waits for others to share its model call (0 = off).")
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH)
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'],
+                        help="Profile the first request's model call into profiles/.")
+    args = parser.parse_args()
+
+    if args.profile:
+        metrics.arm_profile(args.profile)
+
+    app = create_app(args.model, args.batch_window_ms, args.max_batch)
+    print(f"Serving {args.model} on http://{args.host}:{args.port} "
+          f"(batching {'off' if args.batch_window_ms <= 0 else f'{args.batch_window_ms:g} ms window'})")
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Cross-validated benchmark and hyperparameter sweep for the production model.
+
+Every (candidate, fold) pair is fitted in parallel. For each candidate the
+mean ROC AUC, fit time, batch and single-row predict latency and pickled
+model size are recorded, and candidates are ranked by AUC lift per
+millisecond of single-row latency, the quantity that matters in production.
+
+    python tune.py                          # grid search, 5-fold CV, all cores
+    python tune.py --search random --n-iter 30 --folds 3
+"""
+import argparse
+import json
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler, StratifiedKFold
+from threadpoolctl import threadpool_limits
+
+from bundle import build_pipeline
+from dataset import load_training
+from schema import FEATURES
+
+# train.py's current configuration, always evaluated as the reference point
+BASELINE = {'max_iter': 100, 'learning_rate': 0.1, 'max_depth': 5}
+
+GRID = {
+    'max_iter': [100, 200],
+    'learning_rate': [0.05, 0.1],
+    'max_depth': [3, 5, None],
+    'max_leaf_nodes': [15, 31],
+    'max_bins': [63, 255],
+    'early_stopping': [True, False],
+}
+
+# Rows timed one at a time to estimate single-row latency
+LATENCY_ROWS = 200
+
+
+def candidates(search, n_iter, seed):
+    if search == 'grid':
+        params = list(ParameterGrid(GRID))
+    else:
+        params = list(ParameterSampler(GRID, n_iter=n_iter, random_state=seed))
+    return [BASELINE] + [p for p in params if p != BASELINE]
+
+
+def evaluate(params, X, y, train_idx, val_idx, seed, threads):
+    """Fit one candidate on one fold and measure quality, speed and size."""
+    with threadpool_limits(limits=threads):
+        model = build_pipeline(HistGradientBoostingClassifier(random_state=seed, **params))
+
+        start = time.perf_counter()
+        model.fit(X[train_idx], y[train_idx])
+        fit_s = time.perf_counter() - start
+
+        X_val = X[val_idx]
+        start = time.perf_counter()
+        proba = model.predict_proba(X_val)[:, 1]
+        batch_s = time.perf_counter() - start
+
+        singles = []
+        for row in X_val[:LATENCY_ROWS]:
+            start = time.perf_counter()
+            model.predict_proba(row[None, :])
+            singles.append(time.perf_counter() - start)
+
+    return {
+        'auc': roc_auc_score(y[val_idx], proba),
+        'fit_s': fit_s,
+        'batch_us_per_row': batch_s / len(val_idx) * 1e6,
+        'single_row_ms': float(np.median(singles)) * 1e3,
+        'model_kib': len(pickle.dumps(model)) / 1024,
+        'n_iter': int(model.named_steps['model'].n_iter_),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter sweep.")
+    parser.add_argument('train', nargs='?', default='cs-training.csv')
+    parser.add_argument('--search', choices=['grid', 'random'], default='grid')
+    parser.add_argument('--n-iter', type=int, default=20, help="Candidates drawn by --search random.")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('-j', '--jobs', type=int, default=-1, help="Parallel fits (-1 = every core).")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('-o', '--output', default='tuning_results.csv')
+    args = parser.parse_args()
+
+    print("Loading training data...")
+    train = load_training(args.train, verbose=True)
+    X = train[FEATURES].to_numpy(dtype=np.float64)
+    y = train['SeriousDlqin2yrs'].to_numpy()
+
+    params_list = candidates(args.search, args.n_iter, args.seed)
+    folds = list(StratifiedKFold(args.folds, shuffle=True, random_state=args.seed).split(X, y))
+    tasks = [(i, params, fold) for i, params in enumerate(params_list) for fold in folds]
+    # Parallelism comes from the job pool; one OpenMP thread per fit avoids oversubscription
+    threads = None if args.jobs == 1 else 1
+    print(f"Evaluating {len(params_list)} candidates x {args.folds} folds = {len(tasks)} fits...")
+
+    start = time.perf_counter()
+    results = Parallel(n_jobs=args.jobs, verbose=1)(
+        delayed(evaluate)(params, X, y, train_idx, val_idx, args.seed, threads)
+        for _, params, (train_idx, val_idx) in tasks
+    )
+    print(f"Sweep finished in {time.perf_counter() - start:.1f}s.")
+
+    per_fold = pd.DataFrame(results)
+    per_fold['candidate'] = [i for i, _, _ in tasks]
+    summary = per_fold.groupby('candidate').mean()
+    summary['auc_std'] = per_fold.groupby('candidate')['auc'].std()
+    summary['params'] = [json.dumps(params_list[i], sort_keys=True) for i in summary.index]
+    # AUC lift over random per millisecond of single-row latency
+    summary['auc_per_ms'] = (summary['auc'] - 0.5) / summary['single_row_ms']
+    summary = summary.sort_values('auc_per_ms', ascending=False)
+    summary.to_csv(args.output)
+
+    columns = ['auc', 'auc_std', 'fit_s', 'single_row_ms', 'batch_us_per_row', 'model_kib', 'n_iter', 'auc_per_ms']
+    with pd.option_context('display.width', 200, 'display.max_colwidth', 120):
+        print(summary[columns + ['params']].head(10).round(4).to_string())
+
+    best = summary.iloc[0]
+    baseline = summary.loc[0]
+    print(f"\nBaseline (train.py): AUC {baseline['auc']:.4f}, {baseline['single_row_ms']:.2f} ms/row")
+    print(f"Best accuracy-per-ms: AUC {best['auc']:.4f}, {best['single_row_ms']:.2f} ms/row -> {best['params']}")
+    print(f"Most accurate: AUC {summary['auc'].max():.4f} -> {summary.loc[summary['auc'].idxmax(), 'params']}")
+    print(f"All results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""What-if sweeps: one applicant's score across a grid of values for one or two fields.
+
+Instead of a rerun and a single-row prediction per slider move, every
+variant of the profile is built as one (variants x features) array and
+scored with a single ``predict_batch`` call, so a 25 x 25 heatmap costs
+about as much as one prediction round-trip.
+"""
+import numpy as np
+
+# Wizard field -> (label, low, high, points); ranges follow the wizard's inputs
+SWEEPS = {
+    'revolving_utilization': ("Revolving Utilization", 0.0, 2.0, 41),
+    'debt_ratio': ("Debt Ratio", 0.0, 10.0, 51),
+    'monthly_income': ("Monthly Income ($)", 0, 20000, 41),
+    'age': ("Borrower Age", 18, 100, 83),
+    'open_lines': ("Open Credit Lines/Loans", 0, 50, 51),
+    'real_estate_lines': ("Real Estate Loans", 0, 15, 16),
+    'dependents': ("Number of Dependents", 0, 20, 21),
+    'past_due_30_59': ("30-59 Days Late", 0, 20, 21),
+    'past_due_60_89': ("60-89 Days Late", 0, 20, 21),
+    'past_due_90_plus': ("90+ Days Late", 0, 20, 21),
+}
+
+# Points per axis of a two-field heatmap
+HEATMAP_POINTS = 25
+
+
+def axis_values(key, points=None):
+    """Grid of values for one wizard field; whole numbers for integer fields."""
+    _, low, high, default = SWEEPS[key]
+    values = np.linspace(low, high, points or default)
+    if isinstance(low, int) and key != 'monthly_income':
+        values = np.unique(np.round(values))
+    return values
+
+
+def variants(row, columns, axes):
+    """Copies of ``row`` over the full grid of ``axes`` (first axis slowest), one per output row."""
+    grids = np.meshgrid(*axes, indexing='ij')
+    X = np.repeat(np.asarray(row, dtype=np.float64).reshape(1, -1), grids[0].size, axis=0)
+    for column, grid in zip(columns, grids):
+        X[:, column] = grid.ravel()
+    return X
+
+
+def sweep(predictor, values, keys, x, y=None):
+    """Default probabilities with field ``x`` (and ``y``) varied over its SWEEPS range.
+
+    ``predictor`` is a FastPredictor; ``values`` maps ``keys`` (in FEATURES
+    order) to the applicant's values. Returns ``(axes, probs)`` with
+    ``probs.shape == tuple(len(a) for a in axes)``.
+    """
+    fields = [x] if y is None else [x, y]
+    axes = [axis_values(key, None if y is None else HEATMAP_POINTS) for key in fields]
+    row = predictor.fill_row(values, keys)[0]
+    X = variants(row, [keys.index(key) for key in fields], axes)
+    return axes, predictor.predict_batch(X).reshape([len(a) for a in axes])